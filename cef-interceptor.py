@@ -2,6 +2,8 @@
 """
 CEF Interceptor for Palo Alto GlobalProtect Logs
 Intercepts CEF messages, applies dynamic severity mapping, and forwards to SIEM.
+JSON and key=value GlobalProtect logs (formerly archive/forwarder.py) are
+detected per message and converted to CEF through the same pipeline.
 
 Flow: Panorama → Interceptor (parse + modify severity) → LogStash/AMA → Sentinel
 """
@@ -9,9 +11,30 @@ Flow: Panorama → Interceptor (parse + modify severity) → LogStash/AMA → Se
 import socket
 import sys
 import argparse
+import errno
 import logging
 import re
+import os
+import gzip
+import http.client
+import json
+import queue
+import random
+import selectors
+import ssl
+import struct
+import signal
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
 from datetime import datetime
+from urllib.parse import urlsplit
+
+try:
+    import zstandard
+except ImportError:  # optional: only needed for --archive-codec zstd
+    zstandard = None
 
 # Configure logging
 logging.basicConfig(
@@ -239,16 +262,1791 @@ def fallback_insert_severity(cef_message, default_severity=5):
     return cef_message
 
 
+def cef_escape_header(value):
+    """Escape a CEF header value (backslash and pipe)."""
+    return str(value).replace('\\', '\\\\').replace('|', '\\|')
+
+
+def cef_escape_extension(value):
+    """Escape a CEF extension value (backslash, equals and newlines)."""
+    return (str(value).replace('\\', '\\\\').replace('=', '\\=')
+            .replace('\r', '\\r').replace('\n', '\\n'))
+
+
+# CEF extension key → candidate source field names for JSON / key=value input.
+# Complete GlobalProtect mapping per the PAN-OS 10.0+ CEF specification.
+CEF_FIELD_MAP = (
+    # Standard CEF predefined fields
+    ('rt', ('receive_time', '$receive_time', 'log_time')),
+    ('start', ('time_generated', '$time_generated')),
+    ('src', ('public_ip', '$public_ip')),
+    ('c6a2', ('public_ipv6', '$public_ipv6')),
+    ('shost', ('machinename', '$machinename', 'endpoint_device_name')),
+    ('suser', ('srcuser', '$srcuser', 'source_user')),
+    ('sntdom', ('source_user_domain', '$source_user_domain')),
+    ('suid', ('source_user_uuid', '$source_user_uuid')),
+    ('duser', ('dest_user', '$dest_user')),
+    ('dntdom', ('dest_user_domain', '$dest_user_domain')),
+    ('duid', ('dest_user_uuid', '$dest_user_uuid')),
+    ('outcome', ('status', '$status')),
+    ('sourceServiceName', ('log_source', '$log_source')),
+    ('deviceExternalID', ('log_source_id', '$log_source_id')),
+    ('dvchost', ('log_source_name', '$log_source_name')),
+    ('cs3', ('vsys_name', '$vsys_name')),
+
+    # Custom PanOS fields - Device & Config
+    ('PanOSDeviceSN', ('serial', '$serial')),
+    ('PanOSConfigVersion', ('config_version', '$config_version')),
+    ('PanOSDeviceName', ('device_name', '$device_name')),
+    ('PanOSPanoramaSN', ('panorama_serial', '$panorama_serial')),
+
+    # Virtual System
+    ('PanOSVirtualSystem', ('vsys', '$vsys')),
+    ('PanOSVirtualSystemID', ('vsys_id', '$vsys_id')),
+    ('PanOSVirtualSystemName', ('vsys_name', '$vsys_name')),
+
+    # Event Information
+    ('PanOSEventID', ('eventid', '$eventid')),
+    ('PanOSEventIDValue', ('event_id_value', '$event_id_value')),
+    ('PanOSLogTimeStamp', ('time_generated', '$time_generated')),
+    ('PanOSTimeGeneratedHighResolution', ('high_res_timestamp', '$high_res_timestamp')),
+    ('PanOSLogSubtype', ('log_subtype', '$log_subtype', 'subtype')),
+
+    # Connection & Auth
+    ('PanOSStage', ('stage', '$stage')),
+    ('PanOSAuthMethod', ('auth_method', '$auth_method')),
+    ('PanOSTunnelType', ('tunnel_type', '$tunnel_type', 'tunnel')),
+
+    # User & Location
+    ('PanOSSourceUserName', ('srcuser', '$srcuser')),
+    ('PanOSSourceRegion', ('srcregion', '$srcregion', 'source_region')),
+
+    # Endpoint Information
+    ('PanOSEndpointDeviceName', ('machinename', '$machinename')),
+    ('PanOSEndpointSN', ('endpoint_serial_number', '$endpoint_serial_number', 'endpoint_sn')),
+    ('PanOSGlobalProtectClientVersion', ('client_ver', '$client_ver', 'endpoint_gp_version')),
+    ('PanOSEndpointOSType', ('client_os', '$client_os', 'endpoint_os_type')),
+    ('PanOSEndpointOSVersion', ('client_os_ver', '$client_os_ver', 'endpoint_os_version')),
+    ('PanOSHostID', ('hostid', '$hostid', 'host_id')),
+
+    # Network Addresses
+    ('PanOSPublicIPv4', ('public_ip', '$public_ip')),
+    ('PanOSPublicIPv6', ('public_ipv6', '$public_ipv6')),
+    ('PanOSPrivateIPv4', ('private_ip', '$private_ip')),
+    ('PanOSPrivateIPv6', ('private_ipv6', '$private_ipv6')),
+
+    # Event Status & Errors
+    ('PanOSEventStatus', ('status', '$status')),
+    ('PanOSQuarantineReason', ('reason', '$reason', 'quarantine_reason')),
+    ('PanOSConnectionError', ('error', '$error', 'connection_error')),
+    ('PanOSConnectionErrorID', ('error_code', '$error_code', 'connection_error_id')),
+    ('PanOSDescription', ('opaque', '$opaque')),
+
+    # Gateway Information
+    ('PanOSGateway', ('gateway', '$gateway')),
+    ('PanOSGlobalProtectGatewayLocation', ('location', '$location', 'gpg_location')),
+    ('PanOSGatewaySelectionType', ('selection_type', '$selection_type', 'gateway_selection_type')),
+    ('PanOSGatewayPriority', ('priority', '$priority', 'gateway_priority')),
+    ('PanOSAttemptedGateways', ('attempted_gateways', '$attempted_gateways')),
+    ('PanOSPortal', ('portal', '$portal')),
+
+    # Connection Metrics
+    ('PanOSLoginDuration', ('login_duration', '$login_duration')),
+    ('PanOSConnectionMethod', ('connect_method', '$connect_method', 'connection_method')),
+    ('PanOSSSLResponseTime', ('response_time', '$response_time', 'ssl_response_time')),
+
+    # Logging Metadata
+    ('PanOSCountOfRepeats', ('repeatcnt', '$repeatcnt', 'count_of_repeats')),
+    ('PanOSSequenceNo', ('seqno', '$seqno', 'sequence_no')),
+    ('PanOSActionFlags', ('actionflags', '$actionflags')),
+
+    # Device Group Hierarchy
+    ('PanOSDGHierarchyLevel1', ('dg_hier_level_1', '$dg_hier_level_1')),
+    ('PanOSDGHierarchyLevel2', ('dg_hier_level_2', '$dg_hier_level_2')),
+    ('PanOSDGHierarchyLevel3', ('dg_hier_level_3', '$dg_hier_level_3')),
+    ('PanOSDGHierarchyLevel4', ('dg_hier_level_4', '$dg_hier_level_4')),
+
+    # Log Source Information
+    ('LogSourceGroupID', ('log_source_group_id', '$log_source_group_id')),
+    ('PanOSLogSourceTimeZoneOffset', ('log_source_tz_offset', '$log_source_tz_offset')),
+
+    # Platform & Tenant Information
+    ('PlatformType', ('platform_type', '$platform_type')),
+    ('PanOSTenantID', ('customer_id', '$customer_id', 'tenant_id')),
+    ('ProjectName', ('project_name', '$project_name')),
+
+    # Prisma-specific flags
+    ('PanOSIsPrismaNetworks', ('is_prisma_branch', '$is_prisma_branch')),
+    ('PanOSIsPrismaUsers', ('is_prisma_mobile', '$is_prisma_mobile')),
+
+    # Log Management flags
+    ('PanOSIsDuplicateLog', ('is_dup_log', '$is_dup_log')),
+    ('PanOSLogExported', ('is_exported', '$is_exported')),
+    ('PanOSLogForwarded', ('is_forwarded', '$is_forwarded')),
+)
+
+CEF_VENDOR = 'Palo Alto Networks'
+CEF_PRODUCT = 'PAN-OS'
+
+# '$'-prefixed names only appear in Panorama / Strata Logging Service output
+PAN_DOLLAR_FIELDS = frozenset(
+    [name for _, names in CEF_FIELD_MAP for name in names if name.startswith('$')]
+    + ['$type', '$subtype', '$sender_sw_version']
+)
+
+
+def parse_panorama_line(line):
+    """
+    Parse a non-CEF syslog line - supports both JSON and key=value formats.
+
+    The key=value parser is deliberately lightweight (space-delimited) and
+    does not handle quoted values containing spaces.
+
+    Returns:
+        dict: Field name → value, empty if nothing could be parsed
+    """
+    line = line.strip()
+    if not line:
+        return {}
+
+    # Try JSON first (fast path for structured logs)
+    if line.startswith('{'):
+        try:
+            fields = json.loads(line)
+            if isinstance(fields, dict):
+                return fields
+        except json.JSONDecodeError:
+            pass
+
+    # Fallback: simple key=value parser (space-delimited)
+    fields = {}
+    for token in line.split():
+        if '=' in token:
+            k, v = token.split('=', 1)
+            fields[k.strip()] = v.strip()
+
+    return fields
+
+
+def is_globalprotect_fields(fields):
+    """
+    Return True if parsed JSON / key=value fields are a GlobalProtect event.
+
+    Generic keys such as `type`, `status` or `reason` are common in other
+    products' logs, so only an explicit marker counts: `type` / `$type`
+    equal to GLOBALPROTECT, or a '$'-prefixed PAN field name.
+    """
+    log_type = fields.get('type') or fields.get('$type')
+    if log_type is not None and str(log_type).upper() == 'GLOBALPROTECT':
+        return True
+    return any(name in PAN_DOLLAR_FIELDS for name in fields)
+
+
+def fields_to_cef_data(fields):
+    """
+    Map JSON / key=value fields onto the structure returned by parse_cef().
+
+    This lets events that did not arrive as CEF share the same severity,
+    correlation and output stages as native CEF events.
+
+    Returns:
+        dict: parse_cef()-style dictionary with 'severity' set to None, or
+              None if the fields are not a GlobalProtect event (the message
+              is then forwarded unchanged)
+    """
+    if not is_globalprotect_fields(fields):
+        return None
+
+    extensions = {}
+    for key, names in CEF_FIELD_MAP:
+        for name in names:
+            value = fields.get(name)
+            if value is not None and value != '':
+                extensions[key] = str(value)
+                break
+
+    sig_id = fields.get('type') or fields.get('$type')
+    name = fields.get('subtype') or fields.get('$subtype')
+
+    return {
+        'version': '0',
+        'vendor': CEF_VENDOR,
+        'product': CEF_PRODUCT,
+        'device_version': str(fields.get('sender_sw_version') or fields.get('$sender_sw_version') or '-'),
+        'signature_id': str(sig_id or '-'),
+        'name': str(name or '-'),
+        'severity': None,
+        'extensions': extensions,
+        'has_severity': False
+    }
+
+
+def format_cef(cef_data, severity):
+    """Serialise a parse_cef()-style dictionary to a CEF string."""
+    header = '|'.join([
+        'CEF:' + (cef_data.get('version') or '0'),
+        cef_escape_header(cef_data.get('vendor') or CEF_VENDOR),
+        cef_escape_header(cef_data.get('product') or CEF_PRODUCT),
+        cef_escape_header(cef_data.get('device_version') or '-'),
+        cef_escape_header(cef_data.get('signature_id') or '-'),
+        cef_escape_header(cef_data.get('name') or '-'),
+        str(severity),
+    ])
+    ext = ' '.join(f"{k}={cef_escape_extension(v)}" for k, v in cef_data['extensions'].items())
+    return header + '|' + ext
+
+
+INPUT_FORMATS = ('cef', 'syslog-cef', 'json', 'kv', 'unknown')
+
+
+def detect_format(message):
+    """
+    Classify a decoded message by its input format.
+
+    Returns:
+        str: 'cef', 'syslog-cef' (CEF behind a syslog header), 'json',
+             'kv' (key=value) or 'unknown'
+    """
+    if message.startswith('CEF:'):
+        return 'cef'
+    if message.startswith('{'):
+        return 'json'
+    if 'CEF:' in message:
+        return 'syslog-cef'
+    if '=' in message:
+        return 'kv'
+    return 'unknown'
+
+
+def is_auth_failure(cef_data):
+    """Return True if the event reports a failed GlobalProtect attempt."""
+    status = cef_data.get('extensions', {}).get('PanOSEventStatus', '').lower()
+    return status == 'failed' or status == 'failure'
+
+
+class _WindowCounter:
+    """
+    Fixed-size time wheel counting events in a sliding window.
+
+    Each slot covers one bucket width; advancing the wheel zeroes the slots
+    that fell out of the window, so an update touches at most `len(slots)`
+    entries regardless of event rate.
+    """
+
+    __slots__ = ('slots', 'tick', 'total', 'last_seen', 'alerted_tick')
+
+    def __init__(self, size, tick, now):
+        self.slots = [0] * size
+        self.tick = tick
+        self.total = 0
+        self.last_seen = now
+        self.alerted_tick = None
+
+    def add(self, tick, now):
+        size = len(self.slots)
+        elapsed = tick - self.tick
+        if elapsed >= size:
+            for i in range(size):
+                self.slots[i] = 0
+            self.total = 0
+        elif elapsed > 0:
+            for t in range(self.tick + 1, tick + 1):
+                idx = t % size
+                self.total -= self.slots[idx]
+                self.slots[idx] = 0
+        if elapsed > 0:
+            self.tick = tick
+        self.slots[tick % size] += 1
+        self.total += 1
+        self.last_seen = now
+        return self.total
+
+
+class FailureCorrelator:
+    """
+    Stateful sliding-window escalation for repeated authentication failures.
+
+    Failed events are counted per source user (`suser`/`PanOSSourceUserName`),
+    public source IP (`src`/`PanOSPublicIPv4`) and host ID (`PanOSHostID`).
+    When any counter reaches `threshold` within `window` seconds, the event's
+    severity is raised to at least `escalate_to` and, optionally, a synthetic
+    summary CEF event is produced (at most once per key per window).
+
+    Counters idle for longer than `idle_timeout` are evicted in LRU order and
+    the table never holds more than `max_keys` entries, so memory stays bounded
+    with very large user populations. Per-event cost is O(1).
+    """
+
+    KEY_FIELDS = (
+        ('suser', ('suser', 'PanOSSourceUserName')),
+        ('src', ('src', 'PanOSPublicIPv4')),
+        ('hostid', ('PanOSHostID',)),
+    )
+
+    # Upper bound on idle entries evicted per event, keeps the worst case flat
+    EVICT_BATCH = 64
+
+    def __init__(self, window=60, buckets=6, threshold=20, escalate_to=7,
+                 idle_timeout=300, max_keys=500000, emit_summary=False):
+        if window <= 0 or buckets <= 0 or threshold <= 0:
+            raise ValueError("window, buckets and threshold must be positive")
+        self.window = window
+        self.buckets = buckets
+        self.bucket_width = float(window) / buckets
+        self.threshold = threshold
+        self.escalate_to = escalate_to
+        self.idle_timeout = max(idle_timeout, window)
+        self.max_keys = max_keys
+        self.emit_summary = emit_summary
+        self._entries = OrderedDict()
+        self.escalated_count = 0
+        self.summary_count = 0
+        self.evicted_count = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self, now):
+        entries = self._entries
+        cutoff = now - self.idle_timeout
+        for _ in range(self.EVICT_BATCH):
+            if not entries:
+                return
+            key = next(iter(entries))
+            if entries[key].last_seen >= cutoff and len(entries) <= self.max_keys:
+                return
+            entries.popitem(last=False)
+            self.evicted_count += 1
+
+    def observe(self, cef_data, severity, now=None):
+        """
+        Record an event and return its (possibly escalated) severity.
+
+        Args:
+            cef_data: Parsed CEF dictionary
+            severity: Severity from derive_severity()
+            now: Monotonic timestamp override (for testing)
+
+        Returns:
+            tuple: (severity, list of synthetic summary CEF messages)
+        """
+        if not is_auth_failure(cef_data):
+            return severity, []
+
+        if now is None:
+            now = time.monotonic()
+        tick = int(now // self.bucket_width)
+        self._evict(now)
+
+        extensions = cef_data.get('extensions', {})
+        entries = self._entries
+        summaries = []
+
+        for key_name, fields in self.KEY_FIELDS:
+            value = None
+            for field in fields:
+                value = extensions.get(field)
+                if value:
+                    break
+            if not value:
+                continue
+
+            key = (key_name, value)
+            entry = entries.get(key)
+            if entry is None:
+                entry = _WindowCounter(self.buckets, tick, now)
+                entries[key] = entry
+            else:
+                entries.move_to_end(key)
+
+            count = entry.add(tick, now)
+            if count < self.threshold:
+                continue
+
+            if severity < self.escalate_to:
+                severity = self.escalate_to
+                self.escalated_count += 1
+
+            if self.emit_summary and (entry.alerted_tick is None or
+                                      tick - entry.alerted_tick >= self.buckets):
+                entry.alerted_tick = tick
+                summaries.append(self.build_summary(cef_data, key_name, value, count))
+                self.summary_count += 1
+
+        return severity, summaries
+
+    def build_summary(self, cef_data, key_name, value, count):
+        """Build a synthetic CEF event describing a threshold crossing."""
+        ext = {
+            'rt': str(int(time.time() * 1000)),
+            'cnt': str(count),
+            'cs1Label': 'CorrelationKey',
+            'cs1': key_name,
+            'cs2Label': 'CorrelationValue',
+            'cs2': value,
+            'cn1Label': 'WindowSeconds',
+            'cn1': str(self.window),
+            'msg': f"{count} failed GlobalProtect events for {key_name} {value} in {self.window}s",
+        }
+        serial = cef_data.get('extensions', {}).get('PanOSDeviceSN')
+        if serial:
+            ext['PanOSDeviceSN'] = serial
+        summary = {
+            'version': cef_data.get('version'),
+            'vendor': cef_data.get('vendor'),
+            'product': cef_data.get('product'),
+            'device_version': cef_data.get('device_version'),
+            'signature_id': 'GLOBALPROTECT',
+            'name': 'auth-failure-threshold',
+            'extensions': ext,
+        }
+        return format_cef(summary, self.escalate_to)
+
+
+
+
+class _DeviceSequence:
+    """
+    Sequence state for one device: highest number seen plus a fixed-size
+    ring bitmap of the most recent `window` numbers. Advancing the window
+    recycles slots in place, so tracking allocates nothing per event.
+    `in_window` counts the set bits so open gaps are known without a scan.
+    """
+
+    __slots__ = ('highest', 'floor', 'bits', 'in_window', 'missing', 'duplicate',
+                 'out_of_order', 'resets', 'seen')
+
+    def __init__(self, window, seq):
+        self.bits = bytearray(window // 8)
+        self.missing = 0
+        self.duplicate = 0
+        self.out_of_order = 0
+        self.resets = 0
+        self.seen = 1
+        self.restart(seq)
+
+    def restart(self, seq):
+        for i in range(len(self.bits)):
+            self.bits[i] = 0
+        self.in_window = 0
+        self.highest = seq
+        self.floor = seq  # numbers below the first one seen are not expected
+        self._set(seq)
+
+    def _set(self, seq):
+        idx = seq % (len(self.bits) << 3)
+        mask = 1 << (idx & 7)
+        if not self.bits[idx >> 3] & mask:
+            self.bits[idx >> 3] |= mask
+            self.in_window += 1
+
+    def _test(self, seq):
+        idx = seq % (len(self.bits) << 3)
+        return self.bits[idx >> 3] & (1 << (idx & 7))
+
+    def _clear(self, seq):
+        idx = seq % (len(self.bits) << 3)
+        mask = 1 << (idx & 7)
+        if self.bits[idx >> 3] & mask:
+            self.bits[idx >> 3] &= ~mask & 0xFF
+            self.in_window -= 1
+
+    def window_expected(self):
+        window = len(self.bits) << 3
+        return self.highest - max(self.floor, self.highest - window + 1) + 1
+
+    def window_seen(self):
+        return self.in_window
+
+    def observe(self, seq):
+        window = len(self.bits) << 3
+        self.seen += 1
+        highest = self.highest
+
+        if seq > highest:
+            gap = seq - highest
+            if gap >= window:
+                # Whole window slides out: every unset slot is a confirmed loss
+                self.missing += self.window_expected() - self.window_seen()
+                self.missing += max(0, seq - window - highest)
+                for i in range(len(self.bits)):
+                    self.bits[i] = 0
+                self.in_window = 0
+            else:
+                # Recycle the slots of numbers leaving the window
+                for leaving in range(highest + 1 - window, seq + 1 - window):
+                    if leaving >= self.floor and not self._test(leaving):
+                        self.missing += 1
+                    self._clear(leaving)
+            self.highest = seq
+            self._set(seq)
+        elif seq <= highest - window:
+            # Far behind the window: the device restarted its counter.
+            # Holes still open in the old window will never be filled.
+            self.resets += 1
+            self.missing += self.window_expected() - self.window_seen()
+            self.restart(seq)
+        elif seq < self.floor:
+            self.out_of_order += 1
+        elif self._test(seq):
+            self.duplicate += 1
+        else:
+            self.out_of_order += 1
+            self._set(seq)
+
+
+class SequenceTracker:
+    """
+    Per-device sequence-number gap tracking to measure end-to-end loss.
+
+    PAN-OS stamps every log with a sequence number (`PanOSSequenceNo`)
+    and the device serial (`PanOSDeviceSN`); each log type has its own
+    number space. For each (device, log type) stream the tracker keeps the
+    highest number seen and a `window`-bit sliding bitmap of recent
+    numbers, and counts:
+
+        missing       numbers that left the window without being seen
+        duplicate     numbers seen more than once
+        out_of_order  numbers that arrived after a higher one
+        resets        backward jumps larger than the window (device restart)
+
+    Gaps measured at input are loss before the interceptor (network or
+    kernel socket buffer); compare with the interceptor's own error and
+    drop counters for loss inside it, and with the same counters further
+    downstream for loss after it.
+    """
+
+    SEQUENCE_FIELDS = ('PanOSSequenceNo', 'seqno', 'sequence_no')
+    DEVICE_FIELDS = ('PanOSDeviceSN', 'serial')
+
+    def __init__(self, window=4096, max_streams=10000):
+        if window <= 0 or window % 8:
+            raise ValueError("window must be a positive multiple of 8")
+        self.window = window
+        self.max_streams = max_streams
+        self.streams = {}  # device → log type → _DeviceSequence
+        self.stream_count = 0
+        self.untracked = 0
+
+    def observe(self, cef_data):
+        """Record the sequence number carried by a parsed event."""
+        fields = cef_data['extensions']
+        seq = None
+        for name in self.SEQUENCE_FIELDS:
+            seq = fields.get(name)
+            if seq:
+                break
+        device = None
+        for name in self.DEVICE_FIELDS:
+            device = fields.get(name)
+            if device:
+                break
+        if not seq or not device:
+            self.untracked += 1
+            return
+        try:
+            seq = int(seq)
+        except ValueError:
+            self.untracked += 1
+            return
+
+        log_type = cef_data.get('signature_id') or '-'
+        device_streams = self.streams.get(device)
+        if device_streams is None:
+            device_streams = self.streams[device] = {}
+        state = device_streams.get(log_type)
+        if state is None:
+            if self.stream_count >= self.max_streams:
+                self.untracked += 1
+                return
+            device_streams[log_type] = _DeviceSequence(self.window, seq)
+            self.stream_count += 1
+        else:
+            state.observe(seq)
+
+    def totals(self):
+        """Return (missing, duplicate, out_of_order, open holes) across streams."""
+        missing = duplicate = out_of_order = holes = 0
+        for device_streams in self.streams.values():
+            for state in device_streams.values():
+                missing += state.missing
+                duplicate += state.duplicate
+                out_of_order += state.out_of_order
+                holes += state.window_expected() - state.in_window
+        return missing, duplicate, out_of_order, holes
+
+    def stats(self):
+        missing, duplicate, out_of_order, holes = self.totals()
+        return (f"Sequence: {len(self.streams)} devices, {self.stream_count} streams, {missing} missing, "
+                f"{duplicate} duplicate, {out_of_order} out-of-order, "
+                f"{holes} open gaps in window, {self.untracked} untracked")
+
+    def report(self):
+        """Return sequence counters, one line per (device, log type) stream."""
+        lines = [self.stats()]
+        for device, device_streams in sorted(self.streams.items()):
+            for log_type, state in sorted(device_streams.items()):
+                holes = state.window_expected() - state.window_seen()
+                lines.append(f"  {device} {log_type}: last={state.highest} seen={state.seen} "
+                             f"missing={state.missing} duplicate={state.duplicate} "
+                             f"out_of_order={state.out_of_order} open_gaps={holes} "
+                             f"resets={state.resets}")
+        return '\n'.join(lines)
+
+
+# Minimum seconds between reads of the kernel UDP drop counter
+UDP_DROPS_INTERVAL = 10.0
+
+
+def udp_socket_drops(sock):
+    """
+    Return the kernel drop counter for a bound UDP socket, or None.
+
+    Reads /proc/net/udp{,6} (Linux only) and matches the socket by inode.
+    These are datagrams discarded because the receive buffer was full.
+    """
+    try:
+        inode = str(os.fstat(sock.fileno()).st_ino)
+        for path in ('/proc/net/udp', '/proc/net/udp6'):
+            with open(path) as f:
+                next(f)
+                for line in f:
+                    cols = line.split()
+                    if cols[9] == inode:
+                        return int(cols[-1])
+    except (OSError, ValueError, IndexError, StopIteration):
+        pass
+    return None
+
+
+def process_message(cef_message, correlator=None, timers=None, sequences=None,
+                    format_counts=None):
+    """
+    Run one decoded message through detect → parse → severity → rewrite.
+
+    CEF (bare or behind a syslog header) is rewritten in place; JSON and
+    key=value events are mapped to CEF. Every format shares the same
+    severity, correlation and output stages. Unrecognised messages are
+    forwarded unchanged.
+
+    Args:
+        cef_message: Decoded, stripped message string
+        correlator: Optional FailureCorrelator for stateful escalation
+        timers: Optional StageTimers, already started for this message
+        sequences: Optional SequenceTracker for per-device loss measurement
+        format_counts: Optional dict counting messages per input format
+
+    Returns:
+        tuple: (list of (message, cef_data) to forward, parsed ok, severity modified)
+            cef_data is the parsed event with its final severity, or None for
+            fallback, pass-through and synthetic messages.
+    """
+    input_format = detect_format(cef_message)
+    if format_counts is not None:
+        format_counts[input_format] += 1
+
+    prefix = ''
+    if input_format == 'cef':
+        cef_data = parse_cef(cef_message)
+        if timers:
+            timers.mark('parse_cef')
+    elif input_format == 'syslog-cef':
+        # Keep the syslog header, rewrite the CEF payload behind it
+        idx = cef_message.index('CEF:')
+        prefix, cef_message = cef_message[:idx], cef_message[idx:]
+        cef_data = parse_cef(cef_message)
+        if timers:
+            timers.mark('parse_cef')
+    elif input_format in ('json', 'kv'):
+        fields = parse_panorama_line(cef_message)
+        cef_data = fields_to_cef_data(fields) if fields else None
+        if timers:
+            timers.mark('parse_kv')
+        if not cef_data:
+            return [(cef_message, None)], False, False
+    else:
+        return [(cef_message, None)], False, False
+
+    if not cef_data:
+        # Parsing failed - try fallback severity insertion
+        fallback_cef = fallback_insert_severity(cef_message, default_severity=5)
+        if timers:
+            timers.mark('rewrite')
+        return [(prefix + fallback_cef, None)], False, False
+
+    if sequences is not None:
+        sequences.observe(cef_data)
+        if timers:
+            timers.mark('sequence')
+
+    # Derive dynamic severity
+    new_severity = derive_severity(cef_data)
+    old_severity = cef_data.get('severity', 'unknown')
+    if timers:
+        timers.mark('derive_severity')
+
+    summaries = []
+    if correlator is not None:
+        new_severity, summaries = correlator.observe(cef_data, new_severity)
+        if timers:
+            timers.mark('correlate')
+
+    # Modify CEF message, or build it for JSON / key=value input
+    if input_format in ('json', 'kv'):
+        modified_cef = format_cef(cef_data, new_severity)
+    else:
+        modified_cef = prefix + modify_cef_severity(cef_message, new_severity)
+    if timers:
+        timers.mark('rewrite')
+
+    modified = str(new_severity) != str(old_severity)
+    cef_data['severity'] = str(new_severity)
+
+    return [(modified_cef, cef_data)] + [(summary, None) for summary in summaries], True, modified
+
+
+class SyslogSink:
+    """Forward messages to a syslog agent (LogStash, rsyslog/AMA) over UDP or TCP."""
+
+    def __init__(self, forward_ip, forward_port, protocol='udp'):
+        self.protocol = protocol.lower()
+        self.forward_addr = (forward_ip, forward_port)
+        if self.protocol == 'udp':
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            logger.info("Output socket: UDP")
+        else:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.sock.connect(self.forward_addr)
+            logger.info(f"Output socket: TCP (connected to {forward_ip}:{forward_port})")
+
+    def send(self, message, cef_data=None):
+        if self.protocol == 'udp':
+            self.sock.sendto(message.encode('utf-8'), self.forward_addr)
+        else:
+            self.sock.sendall((message + '\n').encode('utf-8'))
+
+    def stats(self):
+        return None
+
+    def close(self):
+        self.sock.close()
+
+
+def cef_to_record(message, cef_data=None):
+    """
+    Convert an outgoing event to a flat JSON-serialisable record.
+
+    Header fields keep their parse_cef() names; extension keys are copied
+    as-is but never override a header field of the same name. Messages that
+    cannot be parsed are kept whole under 'raw'.
+    """
+    now = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+    if cef_data is None and message.startswith('CEF:'):
+        cef_data = parse_cef(message)
+    if cef_data is None:
+        return {'TimeGenerated': now, 'raw': message}
+
+    record = {
+        'TimeGenerated': now,
+        'vendor': cef_data.get('vendor'),
+        'product': cef_data.get('product'),
+        'device_version': cef_data.get('device_version'),
+        'signature_id': cef_data.get('signature_id'),
+        'name': cef_data.get('name'),
+        'severity': int(cef_data['severity']) if str(cef_data.get('severity')).isdigit() else cef_data.get('severity'),
+    }
+    for key, value in cef_data.get('extensions', {}).items():
+        record.setdefault(key, value)
+    return record
+
+
+class HttpSink:
+    """
+    Batched HTTP output (Log Analytics ingestion / Splunk HEC style).
+
+    Events are serialised once on the hot path and appended to an in-memory
+    batch. A batch is handed to the sender pool when it reaches `max_events`
+    or `max_bytes`, or when it is older than `flush_interval` seconds. Up to
+    `max_in_flight` sender threads each keep a persistent keep-alive
+    connection; at most `max_pending` batches wait for a sender, after which
+    send() blocks so pressure propagates upstream instead of growing memory.
+
+    Payload formats:
+        json    gzip-compressed JSON array
+        ndjson  gzip-compressed newline-delimited JSON
+        hec     gzip-compressed Splunk HEC events ({"time": .., "event": {..}})
+
+    Failed requests (connection errors, 429, 5xx) are retried with
+    exponential backoff and jitter; other 4xx responses drop the batch.
+    A reused connection the server closed while idle is replaced and the
+    request resent at once, without counting as a retry.
+    """
+
+    FORMATS = ('json', 'ndjson', 'hec')
+
+    def __init__(self, url, payload_format='json', headers=None, max_events=500,
+                 max_bytes=1048576, flush_interval=1.0, max_in_flight=4,
+                 max_pending=16, max_retries=5, timeout=10.0, backoff=0.5,
+                 max_backoff=30.0, verify_tls=True):
+        if payload_format not in self.FORMATS:
+            raise ValueError(f"Unknown HTTP payload format: {payload_format}")
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f"Invalid HTTP output URL: {url}")
+        if flush_interval <= 0:
+            raise ValueError("flush interval must be positive")
+        if max_in_flight < 1:
+            raise ValueError("at least one request must be allowed in flight")
+
+        self.url = url
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+        self.payload_format = payload_format
+        self.headers = dict(headers or {})
+        self.headers['Content-Encoding'] = 'gzip'
+        self.headers['Content-Type'] = ('application/json' if payload_format == 'json'
+                                        else 'application/x-ndjson')
+        self.max_events = max_events
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.ssl_context = None
+        if self.scheme == 'https':
+            self.ssl_context = ssl.create_default_context()
+            if not verify_tls:
+                self.ssl_context.check_hostname = False
+                self.ssl_context.verify_mode = ssl.CERT_NONE
+
+        self.sent_events = 0
+        self.sent_batches = 0
+        self.failed_batches = 0
+        self.dropped_events = 0
+        self.retries = 0
+
+        self._lock = threading.Lock()
+        self._batch = []
+        self._batch_bytes = 0
+        self._batch_started = None
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._closed = threading.Event()
+
+        self._senders = [
+            threading.Thread(target=self._sender, name=f"http-sender-{i}", daemon=True)
+            for i in range(max_in_flight)
+        ]
+        for thread in self._senders:
+            thread.start()
+        self._flusher = threading.Thread(target=self._flush_loop, name='http-flusher', daemon=True)
+        self._flusher.start()
+
+        logger.info(f"Output: HTTP {payload_format} → {url} "
+                    f"(batch {max_events} events/{max_bytes} bytes/{flush_interval}s, "
+                    f"{max_in_flight} in flight)")
+
+    def send(self, message, cef_data=None):
+        record = cef_to_record(message, cef_data)
+        if self.payload_format == 'hec':
+            record = {'time': time.time(), 'sourcetype': 'pan:globalprotect', 'event': record}
+        encoded = json.dumps(record, separators=(',', ':')).encode('utf-8')
+
+        full = None
+        with self._lock:
+            if not self._batch:
+                self._batch_started = time.monotonic()
+            self._batch.append(encoded)
+            self._batch_bytes += len(encoded) + 1
+            if len(self._batch) >= self.max_events or self._batch_bytes >= self.max_bytes:
+                full = self._take_batch()
+        if full:
+            self._pending.put(full)
+
+    def _take_batch(self):
+        batch = self._batch
+        self._batch = []
+        self._batch_bytes = 0
+        self._batch_started = None
+        return batch
+
+    def _flush_loop(self):
+        tick = min(self.flush_interval, 0.25)
+        while not self._closed.wait(tick):
+            batch = None
+            with self._lock:
+                if self._batch and time.monotonic() - self._batch_started >= self.flush_interval:
+                    batch = self._take_batch()
+            if batch:
+                self._pending.put(batch)
+
+    def _encode(self, batch):
+        if self.payload_format == 'json':
+            body = b'[' + b','.join(batch) + b']'
+        else:
+            body = b'\n'.join(batch) + b'\n'
+        return gzip.compress(body, compresslevel=5)
+
+    def _connect(self):
+        if self.scheme == 'https':
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout,
+                                               context=self.ssl_context)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _post(self, conn, body):
+        """POST one body on an open connection; returns the HTTP status."""
+        conn.request('POST', self.path, body=body, headers=self.headers)
+        resp = conn.getresponse()
+        resp.read()  # drain so the connection can be reused
+        if resp.will_close:
+            conn.close()
+        return resp.status, resp.reason
+
+    def _sender(self):
+        conn = None
+        while True:
+            batch = self._pending.get()
+            if batch is None:
+                break
+            body = self._encode(batch)
+            delay = self.backoff
+            delivered = False
+
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    # Don't hold up shutdown with a long retry schedule
+                    if self._closed.is_set() and attempt > 1:
+                        break
+                    with self._lock:
+                        self.retries += 1
+                    time.sleep(delay * (0.5 + random.random()))
+                    delay = min(delay * 2, self.max_backoff)
+                try:
+                    reused = conn is not None
+                    if conn is None:
+                        conn = self._connect()
+                    try:
+                        status, reason = self._post(conn, body)
+                    except (ConnectionResetError, BrokenPipeError, http.client.RemoteDisconnected):
+                        if not reused:
+                            raise
+                        # Keep-alive connection closed by the server while idle
+                        conn.close()
+                        conn = self._connect()
+                        status, reason = self._post(conn, body)
+                except (OSError, http.client.HTTPException) as e:
+                    if conn is not None:
+                        conn.close()
+                    conn = None
+                    logger.warning(f"HTTP output: {e} (attempt {attempt + 1})")
+                    continue
+
+                if 200 <= status < 300:
+                    delivered = True
+                    break
+                if status != 429 and status < 500:
+                    logger.error(f"HTTP output: {status} {reason}, not retrying")
+                    break
+                logger.warning(f"HTTP output: {status} {reason} (attempt {attempt + 1})")
+
+            with self._lock:
+                if delivered:
+                    self.sent_events += len(batch)
+                    self.sent_batches += 1
+                else:
+                    self.failed_batches += 1
+                    self.dropped_events += len(batch)
+            if not delivered:
+                logger.error(f"HTTP output: dropped batch of {len(batch)} events")
+
+        if conn is not None:
+            conn.close()
+
+    def depth(self):
+        """Number of batches waiting for a sender."""
+        return self._pending.qsize()
+
+    def stats(self):
+        return (f"HTTP: {self.sent_events} events in {self.sent_batches} batches, "
+                f"{self.retries} retries, {self.failed_batches} failed batches "
+                f"({self.dropped_events} events dropped), {self.depth()} pending")
+
+    def close(self):
+        """Flush the open batch and wait for senders to drain."""
+        self._closed.set()
+        with self._lock:
+            batch = self._take_batch() if self._batch else None
+        if batch:
+            self._pending.put(batch)
+        for _ in self._senders:
+            self._pending.put(None)
+        for thread in self._senders:
+            thread.join(timeout=self.timeout * 2)
+
+
+class StageTimers:
+    """
+    Low-overhead cumulative timers for the per-message pipeline stages.
+
+    The hot loop calls start() when a message arrives and mark(stage) after
+    each stage; each mark charges the time since the previous mark to that
+    stage. The sender thread charges sink time to 'send' with add(), so
+    'enqueue' (main thread) and 'send' (sender thread) overlap in time.
+    Disabled instances are falsy, so call sites can guard with
+    `if timers:` and pay a single truth test when timing is off.
+    """
+
+    STAGES = ('decode', 'parse_cef', 'parse_kv', 'sequence', 'derive_severity', 'correlate',
+              'rewrite', 'enqueue', 'send')
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.totals = dict.fromkeys(self.STAGES, 0.0)
+        self.messages = 0
+        self.since = time.monotonic()
+        self._last = 0.0
+
+    def __bool__(self):
+        return self.enabled
+
+    def start(self):
+        self.messages += 1
+        self._last = time.perf_counter()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.totals[stage] += now - self._last
+        self._last = now
+
+    def add(self, stage, elapsed):
+        self.totals[stage] += elapsed
+
+    def report(self):
+        """Return a human-readable summary of time spent per stage."""
+        elapsed = time.monotonic() - self.since
+        busy = sum(self.totals.values())
+        lines = [f"Stage timers: {self.messages} messages over {elapsed:.1f}s, "
+                 f"{busy:.3f}s in pipeline"]
+        for stage in self.STAGES:
+            total = self.totals[stage]
+            per_msg = total / self.messages * 1e6 if self.messages else 0.0
+            share = total / busy * 100 if busy else 0.0
+            lines.append(f"  {stage:<16} {total:10.3f}s {per_msg:9.2f}us/msg {share:5.1f}%")
+        return '\n'.join(lines)
+
+
+class SamplingProfiler:
+    """
+    Time-boxed sampling profiler for a running thread.
+
+    A daemon thread snapshots the target thread's stack every `interval`
+    seconds for `duration` seconds, then writes the aggregated samples in
+    collapsed-stack format (`frame;frame;frame count`), ready for
+    flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, thread_id, duration=30.0, interval=0.005, output_dir=None):
+        self.thread_id = thread_id
+        self.duration = duration
+        self.interval = interval
+        self.output_dir = output_dir or tempfile.gettempdir()
+        self._thread = None
+
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start a profiling run; returns False if one is already running."""
+        if self.running():
+            return False
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return True
+
+    def _run(self):
+        samples = {}
+        deadline = time.monotonic() + self.duration
+        count = 0
+
+        while time.monotonic() < deadline:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            del frame
+            key = ';'.join(reversed(stack))
+            samples[key] = samples.get(key, 0) + 1
+            count += 1
+            time.sleep(self.interval)
+
+        path = os.path.join(
+            self.output_dir,
+            f"cef-interceptor-{os.getpid()}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.folded"
+        )
+        try:
+            with open(path, 'w') as f:
+                for stack, hits in sorted(samples.items()):
+                    f.write(f"{stack} {hits}\n")
+            logger.info(f"Profiler: wrote {count} samples ({len(samples)} unique stacks) to {path}")
+        except OSError as e:
+            logger.error(f"Profiler: cannot write {path}: {e}")
+
+
+def install_profiling_hooks(profiler, timers=None, sequences=None):
+    """
+    Install signal handlers for on-demand profiling.
+
+    SIGUSR1 starts a time-boxed sampling profile; SIGUSR2 logs the stage
+    timers (when enabled) and per-device sequence counters (when
+    tracked). Signals are unavailable on some platforms, in which case
+    this is a no-op.
+    """
+    if not hasattr(signal, 'SIGUSR1'):
+        logger.warning("Profiling signals not supported on this platform")
+        return
+
+    def start_profile(signum, frame):
+        if profiler.start():
+            logger.info(f"Profiler: sampling every {profiler.interval * 1000:.1f}ms "
+                        f"for {profiler.duration:.0f}s")
+        else:
+            logger.info("Profiler: already running, ignoring signal")
+
+    def dump_timers(signum, frame):
+        if timers:
+            logger.info(timers.report())
+        else:
+            logger.info("Stage timers disabled (start with --stage-timers)")
+        if sequences is not None:
+            logger.info(sequences.report())
+
+    signal.signal(signal.SIGUSR1, start_profile)
+    signal.signal(signal.SIGUSR2, dump_timers)
+    logger.info(f"Profiling hooks: kill -USR1 {os.getpid()} to profile, "
+                f"kill -USR2 {os.getpid()} to dump stage timers")
+
+
+def message_severity(message):
+    """Return the CEF severity of a serialised message, or None if it has none."""
+    idx = message.find('CEF:')
+    if idx < 0:
+        return None
+    parts = message[idx:].split('|', 7)
+    if len(parts) == 8 and parts[6].isdigit():
+        return int(parts[6])
+    return None
+
+
+class OutputQueue:
+    """
+    Severity-priority lanes between the processing loop and the output sink.
+
+    Messages are placed in one of four bounded lanes by final severity:
+
+        critical  9-10
+        high      7-8
+        medium    4-6 (and messages without a severity)
+        low       0-3
+
+    A single sender thread drains the lanes by weighted priority: each
+    round takes up to `weights[lane]` messages from every lane, highest
+    first, so a quarantine event waits behind at most one round rather
+    than the whole backlog. Each lane holds up to `maxsize` messages.
+    When a lane is full, `put` sheds its oldest message, or, with
+    `block_when_full`, waits for the sender to make room. The lossy mode
+    suits UDP input, where the lower lanes drain slowest and are the ones
+    that fill and shed under overload. TCP input blocks instead, so no
+    accepted message is dropped; its total depth also drives flow control
+    (see Backpressure), which normally pauses input before any lane fills.
+    """
+
+    LANES = ('critical', 'high', 'medium', 'low')
+    DEFAULT_WEIGHTS = {'critical': 8, 'high': 4, 'medium': 2, 'low': 1}
+    # severity 0-10 → lane index
+    SEVERITY_LANE = (3, 3, 3, 3, 2, 2, 2, 1, 1, 0, 0)
+
+    def __init__(self, sink, maxsize=100000, weights=None, timers=None,
+                 block_when_full=False):
+        self.sink = sink
+        self.maxsize = maxsize
+        self.block_when_full = block_when_full
+        self.timers = timers
+        weights = dict(self.DEFAULT_WEIGHTS, **(weights or {}))
+        self.weights = [max(1, int(weights[lane])) for lane in self.LANES]
+        self.lanes = [deque() for _ in self.LANES]
+        self.send_errors = 0
+        self.shed = [0] * len(self.LANES)
+        self.sent = [0] * len(self.LANES)
+        self._latency_total = [0.0] * len(self.LANES)
+        self._latency_count = [0] * len(self.LANES)
+        self._latency_max = [0.0] * len(self.LANES)
+        self._depth = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='sender', daemon=True)
+        self._thread.start()
+
+    def put(self, message, cef_data=None):
+        if cef_data is not None:
+            severity = cef_data.get('severity')
+            severity = int(severity) if severity and severity.isdigit() else None
+        else:
+            severity = message_severity(message)
+        lane_idx = self.SEVERITY_LANE[severity] if severity is not None and 0 <= severity <= 10 else 2
+
+        with self._cond:
+            lane = self.lanes[lane_idx]
+            if self.block_when_full:
+                while len(lane) >= self.maxsize and not self._closed:
+                    self._cond.wait()
+            if len(lane) >= self.maxsize:
+                lane.popleft()
+                self.shed[lane_idx] += 1
+            else:
+                self._depth += 1
+            lane.append((time.monotonic(), message, cef_data))
+            self._cond.notify()
+
+    def depth(self):
+        return self._depth
+
+    def lane_depths(self):
+        return [len(lane) for lane in self.lanes]
+
+    def _run(self):
+        lanes = self.lanes
+        weights = self.weights
+        while True:
+            batch = []
+            with self._cond:
+                while not self._depth and not self._closed:
+                    self._cond.wait()
+                if not self._depth:
+                    break
+                for lane_idx, lane in enumerate(lanes):
+                    for _ in range(min(weights[lane_idx], len(lane))):
+                        batch.append((lane_idx, lane.popleft()))
+                self._depth -= len(batch)
+                if self.block_when_full:
+                    self._cond.notify_all()
+
+            timers = self.timers
+            latencies = []
+            for lane_idx, (queued_at, message, cef_data) in batch:
+                if timers:
+                    started = time.perf_counter()
+                try:
+                    self.sink.send(message, cef_data)
+                    self.sent[lane_idx] += 1
+                except Exception as e:
+                    self.send_errors += 1
+                    logger.error(f"Error forwarding message: {e}")
+                if timers:
+                    timers.add('send', time.perf_counter() - started)
+                latencies.append((lane_idx, time.monotonic() - queued_at))
+
+            # stats() resets these from another thread
+            with self._cond:
+                for lane_idx, latency in latencies:
+                    self._latency_total[lane_idx] += latency
+                    self._latency_count[lane_idx] += 1
+                    if latency > self._latency_max[lane_idx]:
+                        self._latency_max[lane_idx] = latency
+
+    def stats(self):
+        """Per-lane depth, sent, shed and latency since the previous call."""
+        n = len(self.LANES)
+        with self._cond:
+            totals, self._latency_total = self._latency_total, [0.0] * n
+            counts, self._latency_count = self._latency_count, [0] * n
+            maxima, self._latency_max = self._latency_max, [0.0] * n
+        parts = []
+        for i, lane in enumerate(self.LANES):
+            avg = totals[i] / counts[i] * 1000 if counts[i] else 0.0
+            parts.append(f"{lane} {len(self.lanes[i])} queued/{self.sent[i]} sent/"
+                         f"{self.shed[i]} shed/avg {avg:.1f}ms max {maxima[i] * 1000:.1f}ms")
+        return (f"Output lanes (depth {self._depth}, {self.send_errors} send errors): "
+                + ', '.join(parts))
+
+    def close(self, timeout=30.0):
+        """Let the sender drain what is queued, then stop it."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout=timeout)
+
+
+class Backpressure:
+    """
+    High/low watermark flow control for TCP input.
+
+    Once the output queue reaches `high` the TCP server stops reading from
+    its connections; the kernel receive buffers fill and TCP flow control
+    slows the senders down instead of data being dropped. Reading resumes
+    when the queue has drained to `low`.
+    """
+
+    def __init__(self, depth, high, low):
+        if not 0 <= low < high:
+            raise ValueError("low watermark must be below the high watermark")
+        self.depth = depth
+        self.high = high
+        self.low = low
+        self.paused = False
+        self.pauses = 0
+        self._paused_total = 0.0
+        self._paused_since = None
+
+    def check(self):
+        """Update state from the current queue depth; returns True while paused."""
+        depth = self.depth()
+        if self.paused:
+            if depth <= self.low:
+                self.paused = False
+                self._paused_total += time.monotonic() - self._paused_since
+                self._paused_since = None
+                logger.debug(f"Backpressure: resumed reading at depth {depth}")
+        elif depth >= self.high:
+            self.paused = True
+            self.pauses += 1
+            self._paused_since = time.monotonic()
+            logger.debug(f"Backpressure: paused reading at depth {depth}")
+        return self.paused
+
+    def paused_seconds(self):
+        """Total time spent paused, including the current pause."""
+        total = self._paused_total
+        if self._paused_since is not None:
+            total += time.monotonic() - self._paused_since
+        return total
+
+    def stats(self):
+        return (f"Backpressure: paused {self.pauses} times, {self.paused_seconds():.1f}s total"
+                f"{' (paused now)' if self.paused else ''}")
+
+
+# accept() errors that persist until descriptors or buffers are freed
+ACCEPT_RESOURCE_ERRORS = (errno.EMFILE, errno.ENFILE, errno.ENOBUFS, errno.ENOMEM)
+# Seconds the listener is left out of select() after one of them
+ACCEPT_BACKOFF = 1.0
+
+
+def serve_tcp(in_sock, handle, backpressure, recv_size=65535):
+    """
+    Selector-based TCP server with watermark flow control.
+
+    Each select round gives every readable connection exactly one recv()
+    of at most `recv_size` bytes, so one busy Log Collector cannot starve
+    the others. While `backpressure` reports paused, connections are not
+    read at all (new connections are still accepted). If accept() fails
+    for lack of file descriptors, the listener stays readable, so it is
+    left out of select() for ACCEPT_BACKOFF seconds instead of spinning.
+
+    Args:
+        in_sock: Bound, listening TCP socket
+        handle: Callable invoked with each complete line (bytes)
+        backpressure: Backpressure instance
+        recv_size: Maximum bytes read per connection per round
+    """
+    sel = selectors.DefaultSelector()
+    in_sock.setblocking(False)
+    sel.register(in_sock, selectors.EVENT_READ)
+    conns = {}  # socket → [client address, partial line, message count]
+    reading = True
+    accepting = True
+    accept_retry_at = 0.0
+
+    def close(conn):
+        addr, buf, count = conns.pop(conn)
+        if buf.strip():
+            handle(buf)
+            count += 1
+        if reading:
+            sel.unregister(conn)
+        conn.close()
+        logger.info(f"Connection closed from {addr}, processed {count} messages")
+
+    try:
+        while True:
+            paused = backpressure.check()
+            if paused and reading:
+                for conn in conns:
+                    sel.unregister(conn)
+                reading = False
+            elif not paused and not reading:
+                for conn in conns:
+                    sel.register(conn, selectors.EVENT_READ)
+                reading = True
+
+            timeout = 0.05 if paused else 1.0
+            if not accepting:
+                now = time.monotonic()
+                if now >= accept_retry_at:
+                    sel.register(in_sock, selectors.EVENT_READ)
+                    accepting = True
+                else:
+                    timeout = min(timeout, accept_retry_at - now)
+
+            for key, _ in sel.select(timeout=timeout):
+                sock = key.fileobj
+                if sock is in_sock:
+                    try:
+                        conn, client_addr = in_sock.accept()
+                    except BlockingIOError:
+                        continue
+                    except OSError as e:
+                        # e.g. ECONNABORTED or EMFILE - keep serving existing connections
+                        logger.error(f"Error accepting connection: {e}")
+                        if e.errno in ACCEPT_RESOURCE_ERRORS:
+                            sel.unregister(in_sock)
+                            accepting = False
+                            accept_retry_at = time.monotonic() + ACCEPT_BACKOFF
+                        continue
+                    conn.setblocking(False)
+                    conns[conn] = [client_addr, b'', 0]
+                    if reading:
+                        sel.register(conn, selectors.EVENT_READ)
+                    logger.info(f"New connection from {client_addr}")
+                    continue
+
+                try:
+                    chunk = sock.recv(recv_size)
+                except BlockingIOError:
+                    continue
+                except OSError as e:
+                    logger.error(f"Error reading from {conns[sock][0]}: {e}")
+                    chunk = b''
+                if not chunk:
+                    close(sock)
+                    continue
+
+                state = conns[sock]
+                lines = (state[1] + chunk).split(b'\n')
+                state[1] = lines.pop()
+                for line in lines:
+                    handle(line)
+                state[2] += len(lines)
+    finally:
+        for conn in list(conns):
+            conn.close()
+        sel.close()
+
+
+class RawArchive:
+    """
+    Compressed archive of the exact bytes received, with a sparse time index.
+
+    The hot path only appends (timestamp, bytes) to a bounded deque; a
+    background thread frames the records, compresses them in independent
+    blocks (gzip members or zstd frames) and appends the blocks to rotating
+    segment files. For every block a line `first_ms last_ms offset length
+    count` is appended to the segment's `.idx` file, so fetch_archive() can
+    seek to and decompress only the blocks covering a time range.
+
+    Records inside a block are framed as a big-endian (uint64 ms timestamp,
+    uint32 length) header followed by the raw bytes. If the writer falls
+    behind by more than `max_pending` messages, new messages are counted as
+    dropped from the archive; forwarding is never slowed down. Messages in
+    a block that cannot be written are counted separately as write_failed,
+    so each counter has a single writing thread.
+    """
+
+    CODECS = ('gzip', 'zstd')
+    RECORD_HEADER = struct.Struct('>QI')
+
+    def __init__(self, directory, codec='gzip', block_bytes=1048576, block_seconds=5.0,
+                 segment_bytes=268435456, segment_seconds=3600, keep_segments=0,
+                 max_pending=200000):
+        if codec not in self.CODECS:
+            raise ValueError(f"Unknown archive codec: {codec}")
+        if codec == 'zstd' and zstandard is None:
+            raise ValueError("zstd archive codec requires the 'zstandard' package")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.codec = codec
+        self.block_bytes = block_bytes
+        self.block_seconds = block_seconds
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.keep_segments = keep_segments
+        self.max_pending = max_pending
+
+        self.archived = 0
+        self.dropped = 0        # hot path only
+        self.write_failed = 0   # writer thread only
+        self.segments = 0
+
+        self._pending = deque()
+        self._closed = threading.Event()
+        self._segment = None
+        self._index = None
+        self._segment_started = 0.0
+        self._compressor = zstandard.ZstdCompressor(level=3) if codec == 'zstd' else None
+        self._thread = threading.Thread(target=self._run, name='raw-archive', daemon=True)
+        self._thread.start()
+        logger.info(f"Raw archive: {codec} segments in {directory}")
+
+    def write(self, data):
+        """Queue one raw message for archiving (called from the hot path)."""
+        if len(self._pending) < self.max_pending:
+            self._pending.append((time.time(), data))
+        else:
+            self.dropped += 1
+
+    def _compress(self, data):
+        if self._compressor is not None:
+            return self._compressor.compress(data)
+        return gzip.compress(data, compresslevel=6)
+
+    def _open_segment(self, now):
+        suffix = '.zst' if self.codec == 'zstd' else '.gz'
+        name = (f"raw-{datetime.fromtimestamp(now).strftime('%Y%m%d-%H%M%S')}"
+                f"-{os.getpid()}-{self.segments:05d}{suffix}")
+        path = os.path.join(self.directory, name)
+        self._segment = open(path, 'ab')
+        self._index = open(path + '.idx', 'a')
+        self._segment_started = now
+        self.segments += 1
+        self._expire_segments()
+
+    def _close_segment(self):
+        if self._segment is not None:
+            self._segment.close()
+            self._index.close()
+            self._segment = None
+            self._index = None
+
+    def _expire_segments(self):
+        if not self.keep_segments:
+            return
+        segments = list_archive_segments(self.directory)
+        for path in segments[:-self.keep_segments]:
+            for victim in (path, path + '.idx'):
+                try:
+                    os.remove(victim)
+                except OSError as e:
+                    logger.warning(f"Raw archive: cannot remove {victim}: {e}")
+
+    def _write_block(self, block, first_ts, last_ts, count):
+        if (self._segment is None or
+                self._segment.tell() >= self.segment_bytes or
+                first_ts - self._segment_started >= self.segment_seconds):
+            self._close_segment()
+            self._open_segment(first_ts)
+        payload = self._compress(bytes(block))
+        offset = self._segment.tell()
+        self._segment.write(payload)
+        self._segment.flush()
+        self._index.write(f"{int(first_ts * 1000)} {int(last_ts * 1000)} {offset} {len(payload)} {count}\n")
+        self._index.flush()
+        self.archived += count
+
+    def _run(self):
+        pending = self._pending
+        header = self.RECORD_HEADER
+        block = bytearray()
+        first_ts = last_ts = 0.0
+        count = 0
+        block_started = time.monotonic()
+
+        while True:
+            closing = self._closed.is_set()
+            while pending:
+                ts, data = pending.popleft()
+                if not count:
+                    first_ts = ts
+                    block_started = time.monotonic()
+                block += header.pack(int(ts * 1000), len(data))
+                block += data
+                last_ts = ts
+                count += 1
+                if len(block) >= self.block_bytes:
+                    break
+
+            if count and (closing or len(block) >= self.block_bytes or
+                          time.monotonic() - block_started >= self.block_seconds):
+                try:
+                    self._write_block(block, first_ts, last_ts, count)
+                except OSError as e:
+                    self.write_failed += count
+                    logger.error(f"Raw archive: write failed, {count} messages lost: {e}")
+                block = bytearray()
+                count = 0
+                continue
+
+            if closing and not pending:
+                break
+            if not pending:
+                time.sleep(0.05)
+
+        self._close_segment()
+
+    def stats(self):
+        return (f"Raw archive: {self.archived} archived, {self.dropped} dropped, "
+                f"{self.write_failed} write failed, "
+                f"{len(self._pending)} pending, {self.segments} segments")
+
+    def close(self, timeout=30.0):
+        """Write out everything queued so far and close the current segment."""
+        self._closed.set()
+        self._thread.join(timeout=timeout)
+
+
+def list_archive_segments(directory):
+    """Return archive segment paths in chronological order."""
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.startswith('raw-') and name.endswith(('.gz', '.zst'))
+    )
+
+
+def fetch_archive(directory, start, end, out, framed=False):
+    """
+    Write archived messages received between `start` and `end` to `out`.
+
+    Only blocks whose index range overlaps the request are read and
+    decompressed. Each message is written as its exact bytes followed by
+    a newline, which is ambiguous for messages that contain newlines
+    themselves. With `framed`, each message is instead preceded by the
+    archive's own record header (uint64 ms timestamp, uint32 length,
+    big-endian) and no separator is added.
+
+    Args:
+        directory: Archive directory
+        start, end: Epoch seconds (inclusive)
+        out: Binary file object
+        framed: Write length-prefixed records instead of lines
+
+    Returns:
+        int: Number of messages written
+    """
+    start_ms = int(start * 1000)
+    end_ms = int(end * 1000)
+    header = RawArchive.RECORD_HEADER
+    written = 0
+
+    for path in list_archive_segments(directory):
+        blocks = []
+        try:
+            with open(path + '.idx') as f:
+                for line in f:
+                    fields = line.split()
+                    if not fields:
+                        continue
+                    try:
+                        if len(fields) != 5:
+                            raise ValueError
+                        blocks.append(tuple(int(v) for v in fields))
+                    except ValueError:
+                        logger.warning(f"Fetch: skipping malformed index line in {path}.idx: {line.strip()}")
+        except OSError:
+            logger.warning(f"Fetch: no index for {path}, skipping")
+            continue
+        blocks = [b for b in blocks if b[1] >= start_ms and b[0] <= end_ms]
+        if not blocks:
+            continue
+
+        with open(path, 'rb') as seg:
+            for first_ms, last_ms, offset, length, count in blocks:
+                seg.seek(offset)
+                payload = seg.read(length)
+                if path.endswith('.zst'):
+                    if zstandard is None:
+                        raise RuntimeError("zstd archive requires the 'zstandard' package")
+                    data = zstandard.ZstdDecompressor().decompress(payload)
+                else:
+                    data = gzip.decompress(payload)
+
+                pos = 0
+                while pos < len(data):
+                    ts_ms, size = header.unpack_from(data, pos)
+                    pos += header.size
+                    if start_ms <= ts_ms <= end_ms:
+                        if framed:
+                            out.write(data[pos - header.size:pos + size])
+                        else:
+                            out.write(data[pos:pos + size])
+                            out.write(b'\n')
+                        written += 1
+                    pos += size
+
+    return written
+
+
+def parse_time_arg(value):
+    """Parse epoch seconds or an ISO-8601 timestamp (local time if naive)."""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid time: {value} (use epoch seconds or ISO-8601)")
+
+
+def fetch_main(argv):
+    """`cef-interceptor.py fetch`: extract raw messages from the archive."""
+    parser = argparse.ArgumentParser(
+        prog='cef-interceptor.py fetch',
+        description='Extract raw messages received in a time range from the raw archive'
+    )
+    parser.add_argument('--archive-dir', required=True,
+                        help='Archive directory (as given to --archive-dir)')
+    parser.add_argument('--from', dest='start', type=parse_time_arg, required=True,
+                        help='Start time, epoch seconds or ISO-8601 (e.g. 2026-01-15T14:00:00)')
+    parser.add_argument('--to', dest='end', type=parse_time_arg, default=None,
+                        help='End time (default: now)')
+    parser.add_argument('--output', default='-',
+                        help='Output file (default: stdout)')
+    parser.add_argument('--framed', action='store_true',
+                        help='Prefix each message with a big-endian (uint64 ms timestamp, '
+                             'uint32 length) header instead of ending it with a newline')
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.archive_dir):
+        parser.error(f'archive directory not found: {args.archive_dir}')
+    end = args.end if args.end is not None else time.time()
+    if args.start > end:
+        parser.error('--from must not be later than --to')
+    if args.output == '-':
+        count = fetch_archive(args.archive_dir, args.start, end, sys.stdout.buffer, args.framed)
+        sys.stdout.buffer.flush()
+    else:
+        with open(args.output, 'wb') as out:
+            count = fetch_archive(args.archive_dir, args.start, end, out, args.framed)
+    logger.info(f"Fetched {count} messages")
+
+
 def run_interceptor(listen_ip, listen_port, forward_ip, forward_port,
-                   input_protocol='udp', output_protocol='udp'):
+                   input_protocol='udp', output_protocol='udp', correlator=None,
+                   timers=None, sink=None, sequences=None, queue_size=100000,
+                   high_watermark=80000, low_watermark=50000, archive=None,
+                   lane_weights=None):
     """
     Main interceptor loop.
 
     Listens for CEF messages, applies severity mapping, and forwards to SIEM agent.
+    If `sink` is given (e.g. an HttpSink) it replaces the syslog output.
+    Processed messages pass through severity-priority output lanes of
+    `queue_size` each, drained by `lane_weights`. UDP input sheds the oldest
+    message of a full lane; TCP input waits for room instead, stops reading
+    above `high_watermark` total depth and resumes at `low_watermark`.
+    If `archive` (a RawArchive) is given, every received message is tapped to it.
     """
     logger.info(f"Starting CEF Interceptor")
     logger.info(f"Input:  {input_protocol.upper()}://{listen_ip}:{listen_port}")
-    logger.info(f"Output: {output_protocol.upper()}://{forward_ip}:{forward_port}")
+    if sink is None:
+        logger.info(f"Output: {output_protocol.upper()}://{forward_ip}:{forward_port}")
+    if correlator is not None:
+        logger.info(f"Failure correlation: {correlator.threshold} failures in "
+                    f"{correlator.window}s → severity {correlator.escalate_to}")
 
     # Create input socket
     if input_protocol.lower() == 'udp':
@@ -263,18 +2061,88 @@ def run_interceptor(listen_ip, listen_port, forward_ip, forward_port,
         in_sock.listen(128)
         logger.info(f"Listening on TCP {listen_ip}:{listen_port}")
 
-    # Create output socket
-    if output_protocol.lower() == 'udp':
-        out_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        logger.info("Output socket: UDP")
-    else:
-        out_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        out_sock.connect((forward_ip, forward_port))
-        logger.info(f"Output socket: TCP (connected to {forward_ip}:{forward_port})")
+    # Create output
+    if sink is None:
+        sink = SyslogSink(forward_ip, forward_port, output_protocol)
+    is_tcp = input_protocol.lower() == 'tcp'
+    out_queue = OutputQueue(sink, maxsize=queue_size, weights=lane_weights, timers=timers,
+                            block_when_full=is_tcp)
+    backpressure = None
+    if is_tcp:
+        backpressure = Backpressure(out_queue.depth, high_watermark, low_watermark)
+        logger.info(f"TCP backpressure: pause at queue depth {high_watermark}, resume at {low_watermark}")
 
     msg_count = 0
     modified_count = 0
     error_count = 0
+    format_counts = dict.fromkeys(INPUT_FORMATS, 0)
+    udp_drops = None
+    udp_drops_read_at = float('-inf')
+
+    def log_stats():
+        nonlocal udp_drops, udp_drops_read_at
+        logger.info(f"Processed {msg_count} messages, modified {modified_count} severities, {error_count} errors")
+        logger.info("Input formats: " + ', '.join(f"{fmt}={n}" for fmt, n in format_counts.items() if n))
+        if correlator is not None:
+            logger.info(f"Correlation: {len(correlator)} keys tracked, "
+                        f"{correlator.escalated_count} escalated, "
+                        f"{correlator.summary_count} summaries, "
+                        f"{correlator.evicted_count} evicted")
+        logger.info(out_queue.stats())
+        if backpressure is not None:
+            logger.info(backpressure.stats())
+        sink_stats = sink.stats()
+        if sink_stats:
+            logger.info(sink_stats)
+        if archive is not None:
+            logger.info(archive.stats())
+        if sequences is not None:
+            # /proc/net/udp is a full table scan; refresh it at most every few seconds
+            now = time.monotonic()
+            if not is_tcp and now - udp_drops_read_at >= UDP_DROPS_INTERVAL:
+                udp_drops = udp_socket_drops(in_sock)
+                udp_drops_read_at = now
+            drops = udp_drops
+            logger.info(sequences.stats() +
+                        (f", {drops} UDP kernel drops" if drops is not None else ''))
+
+    def handle(data):
+        nonlocal msg_count, modified_count, error_count
+        if archive is not None:
+            archive.write(data)
+        try:
+            if timers:
+                timers.start()
+            cef_message = data.decode('utf-8', errors='ignore').strip()
+
+            if not cef_message:
+                return
+            if timers:
+                timers.mark('decode')
+
+            outputs, parsed, modified = process_message(cef_message, correlator, timers,
+                                                        sequences, format_counts)
+
+            # Forward to SIEM agent
+            for output, event in outputs:
+                out_queue.put(output, event)
+            if timers:
+                timers.mark('enqueue')
+
+            if parsed:
+                msg_count += 1
+                if modified:
+                    modified_count += 1
+
+                # Log stats every 1000 messages
+                if msg_count % 1000 == 0:
+                    log_stats()
+            else:
+                error_count += 1
+
+        except Exception as e:
+            logger.error(f"Error processing message: {e}")
+            error_count += 1
 
     try:
         if input_protocol.lower() == 'udp':
@@ -282,117 +2150,41 @@ def run_interceptor(listen_ip, listen_port, forward_ip, forward_port,
             while True:
                 try:
                     data, addr = in_sock.recvfrom(65535)
-                    cef_message = data.decode('utf-8', errors='ignore').strip()
-
-                    if not cef_message:
-                        continue
-
-                    # Parse CEF
-                    cef_data = parse_cef(cef_message)
-
-                    if cef_data:
-                        # Derive dynamic severity
-                        new_severity = derive_severity(cef_data)
-                        old_severity = cef_data.get('severity', 'unknown')
-
-                        # Modify CEF message
-                        modified_cef = modify_cef_severity(cef_message, new_severity)
-
-                        # Forward to SIEM agent
-                        if output_protocol.lower() == 'udp':
-                            out_sock.sendto(modified_cef.encode('utf-8'), (forward_ip, forward_port))
-                        else:
-                            out_sock.sendall((modified_cef + '\n').encode('utf-8'))
-
-                        msg_count += 1
-                        if str(new_severity) != str(old_severity):
-                            modified_count += 1
-
-                        # Log stats every 1000 messages
-                        if msg_count % 1000 == 0:
-                            logger.info(f"Processed {msg_count} messages, modified {modified_count} severities, {error_count} errors")
-                    else:
-                        error_count += 1
-                        # Parsing failed - try fallback severity insertion
-                        fallback_cef = fallback_insert_severity(cef_message, default_severity=5)
-                        if output_protocol.lower() == 'udp':
-                            out_sock.sendto(fallback_cef.encode('utf-8'), (forward_ip, forward_port))
-                        else:
-                            out_sock.sendall((fallback_cef + '\n').encode('utf-8'))
-
-                except Exception as e:
-                    logger.error(f"Error processing message: {e}")
+                except OSError as e:
+                    logger.error(f"Error receiving message: {e}")
                     error_count += 1
                     continue
+                handle(data)
         else:
-            # TCP mode: accept connections
-            while True:
-                try:
-                    conn, client_addr = in_sock.accept()
-                    logger.info(f"New connection from {client_addr}")
-
-                    with conn:
-                        buf = b""
-
-                        while True:
-                            chunk = conn.recv(65535)
-                            if not chunk:
-                                break
-
-                            buf += chunk
-
-                            # Process complete lines
-                            while b'\n' in buf:
-                                line, buf = buf.split(b'\n', 1)
-                                cef_message = line.decode('utf-8', errors='ignore').strip()
-
-                                if not cef_message:
-                                    continue
-
-                                # Parse CEF
-                                cef_data = parse_cef(cef_message)
-
-                                if cef_data:
-                                    # Derive dynamic severity
-                                    new_severity = derive_severity(cef_data)
-                                    old_severity = cef_data.get('severity', 'unknown')
-
-                                    # Modify CEF message
-                                    modified_cef = modify_cef_severity(cef_message, new_severity)
-
-                                    # Forward to SIEM agent
-                                    if output_protocol.lower() == 'udp':
-                                        out_sock.sendto(modified_cef.encode('utf-8'), (forward_ip, forward_port))
-                                    else:
-                                        out_sock.sendall((modified_cef + '\n').encode('utf-8'))
-
-                                    msg_count += 1
-                                    if str(new_severity) != str(old_severity):
-                                        modified_count += 1
-                                else:
-                                    error_count += 1
-                                    # Parsing failed - try fallback severity insertion
-                                    fallback_cef = fallback_insert_severity(cef_message, default_severity=5)
-                                    if output_protocol.lower() == 'udp':
-                                        out_sock.sendto(fallback_cef.encode('utf-8'), (forward_ip, forward_port))
-                                    else:
-                                        out_sock.sendall((fallback_cef + '\n').encode('utf-8'))
-
-                    logger.info(f"Connection closed from {client_addr}, processed {msg_count} messages")
-
-                except Exception as e:
-                    logger.error(f"Error handling connection: {e}")
-                    continue
+            # TCP mode: multiplex connections with flow control
+            serve_tcp(in_sock, handle, backpressure)
 
     except KeyboardInterrupt:
         logger.info(f"\nInterceptor stopped by user")
         logger.info(f"Final stats: {msg_count} messages processed, {modified_count} severities modified, {error_count} errors")
+        logger.info("Input formats: " + ', '.join(f"{fmt}={n}" for fmt, n in format_counts.items() if n))
+        if backpressure is not None:
+            logger.info(backpressure.stats())
+        if timers:
+            logger.info(timers.report())
+        if sequences is not None:
+            logger.info(sequences.report())
     finally:
         in_sock.close()
-        out_sock.close()
+        out_queue.close()
+        sink.close()
+        sink_stats = sink.stats()
+        if sink_stats:
+            logger.info(sink_stats)
+        if archive is not None:
+            archive.close()
+            logger.info(archive.stats())
 
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'fetch':
+        return fetch_main(sys.argv[2:])
+
     parser = argparse.ArgumentParser(
         description='CEF Interceptor - Modify Palo Alto GlobalProtect CEF severity dynamically',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -409,6 +2201,11 @@ Examples:
 
   # Forward to remote host
   python3 cef-interceptor.py --listen-port 5514 --forward-ip 10.0.0.5 --forward-port 514
+
+  # Archive raw input, then extract an hour of it
+  python3 cef-interceptor.py --archive-dir /var/lib/cef-interceptor/archive
+  python3 cef-interceptor.py fetch --archive-dir /var/lib/cef-interceptor/archive \\
+      --from 2026-01-15T14:00:00 --to 2026-01-15T15:00:00 > raw.log
         """
     )
 
@@ -422,11 +2219,83 @@ Examples:
                        help='Port to forward to (default: 514)')
     parser.add_argument('--input-protocol', choices=['udp', 'tcp'], default='udp',
                        help='Input protocol (default: udp)')
-    parser.add_argument('--output-protocol', choices=['udp', 'tcp'], default='udp',
-                       help='Output protocol (default: udp)')
+    parser.add_argument('--output-protocol', choices=['udp', 'tcp', 'http'], default='udp',
+                       help='Output protocol (default: udp); http requires --http-url')
     parser.add_argument('--verbose', action='store_true',
                        help='Enable verbose logging')
 
+    correlation = parser.add_argument_group('failure correlation')
+    correlation.add_argument('--correlate-failures', action='store_true',
+                             help='Escalate repeated auth failures per user/IP/host ID')
+    correlation.add_argument('--correlation-window', type=int, default=60,
+                             help='Sliding window in seconds (default: 60)')
+    correlation.add_argument('--correlation-threshold', type=int, default=20,
+                             help='Failures within the window that trigger escalation (default: 20)')
+    correlation.add_argument('--correlation-severity', type=int, default=7,
+                             help='Minimum severity for escalated events (default: 7)')
+    correlation.add_argument('--correlation-idle-timeout', type=int, default=300,
+                             help='Evict counters idle for this many seconds (default: 300)')
+    correlation.add_argument('--correlation-max-keys', type=int, default=500000,
+                             help='Maximum tracked user/IP/host keys (default: 500000)')
+    correlation.add_argument('--correlation-summary', action='store_true',
+                             help='Emit a synthetic summary CEF event when a threshold is crossed')
+
+    http_output = parser.add_argument_group('HTTP output (--output-protocol http)')
+    http_output.add_argument('--http-url',
+                             help='Ingestion endpoint, e.g. https://splunk:8088/services/collector/event')
+    http_output.add_argument('--http-format', choices=HttpSink.FORMATS, default='json',
+                             help='Payload format: json array, ndjson, or Splunk hec (default: json)')
+    http_output.add_argument('--http-header', action='append', default=[], metavar='NAME:VALUE',
+                             help='Extra request header, repeatable (e.g. "Authorization: Splunk <token>")')
+    http_output.add_argument('--http-batch-events', type=int, default=500,
+                             help='Flush a batch at this many events (default: 500)')
+    http_output.add_argument('--http-batch-bytes', type=int, default=1048576,
+                             help='Flush a batch at this many uncompressed bytes (default: 1048576)')
+    http_output.add_argument('--http-flush-interval', type=float, default=1.0,
+                             help='Flush a partial batch after this many seconds (default: 1.0)')
+    http_output.add_argument('--http-max-in-flight', type=int, default=4,
+                             help='Concurrent requests / keep-alive connections (default: 4)')
+    http_output.add_argument('--http-max-retries', type=int, default=5,
+                             help='Retries per batch with exponential backoff (default: 5)')
+    http_output.add_argument('--http-insecure', action='store_true',
+                             help='Skip TLS certificate verification')
+
+    parser.add_argument('--queue-size', type=int, default=100000,
+                       help='Capacity of each severity lane of the output queue (default: 100000)')
+    parser.add_argument('--lane-weights', default='critical=8,high=4,medium=2,low=1',
+                       help='Messages drained per round from each severity lane '
+                            '(default: critical=8,high=4,medium=2,low=1)')
+    parser.add_argument('--high-watermark', type=int, default=None,
+                       help='TCP input pauses at this queue depth (default: 80%% of --queue-size)')
+    parser.add_argument('--low-watermark', type=int, default=None,
+                       help='TCP input resumes at this queue depth (default: 50%% of --queue-size)')
+    parser.add_argument('--track-sequence', action='store_true',
+                       help='Track per-device sequence numbers to measure loss')
+    parser.add_argument('--sequence-window', type=int, default=4096,
+                       help='Reorder window in sequence numbers, multiple of 8 (default: 4096)')
+
+    archive = parser.add_argument_group('raw archive (extract with: cef-interceptor.py fetch --help)')
+    archive.add_argument('--archive-dir',
+                         help='Archive every received message, compressed, in this directory')
+    archive.add_argument('--archive-codec', choices=RawArchive.CODECS, default='gzip',
+                         help='Segment compression; zstd needs the zstandard package (default: gzip)')
+    archive.add_argument('--archive-segment-mb', type=int, default=256,
+                         help='Rotate segments at this compressed size in MB (default: 256)')
+    archive.add_argument('--archive-segment-seconds', type=int, default=3600,
+                         help='Rotate segments after this many seconds (default: 3600)')
+    archive.add_argument('--archive-keep', type=int, default=0,
+                         help='Keep at most this many segments, 0 = unlimited (default: 0)')
+
+    profiling = parser.add_argument_group('profiling (SIGUSR1: sample profile, SIGUSR2: dump stage timers)')
+    profiling.add_argument('--stage-timers', action='store_true',
+                           help='Record cumulative time per pipeline stage')
+    profiling.add_argument('--profile-seconds', type=float, default=30.0,
+                           help='Duration of a SIGUSR1 sampling profile (default: 30)')
+    profiling.add_argument('--profile-interval', type=float, default=5.0,
+                           help='Sampling interval in milliseconds (default: 5)')
+    profiling.add_argument('--profile-dir', default=None,
+                           help='Directory for collapsed-stack output (default: system temp dir)')
+
     args = parser.parse_args()
 
     if args.verbose:
@@ -436,13 +2305,110 @@ Examples:
     if args.listen_port < 1024:
         logger.warning(f"Port {args.listen_port} is privileged - requires root or CAP_NET_BIND_SERVICE")
 
+    high_watermark = args.high_watermark
+    if high_watermark is None:
+        high_watermark = args.queue_size * 8 // 10
+    low_watermark = args.low_watermark
+    if low_watermark is None:
+        low_watermark = args.queue_size // 2
+    if not 0 <= low_watermark < high_watermark < args.queue_size:
+        parser.error('watermarks must satisfy 0 <= low < high < --queue-size')
+
+    lane_weights = {}
+    for item in args.lane_weights.split(','):
+        lane, sep, weight = item.partition('=')
+        if not sep or lane.strip() not in OutputQueue.LANES or not weight.strip().isdigit():
+            parser.error(f"Invalid --lane-weights entry: {item} (lanes: {', '.join(OutputQueue.LANES)})")
+        lane_weights[lane.strip()] = int(weight)
+
+    raw_archive = None
+    if args.archive_dir:
+        try:
+            raw_archive = RawArchive(
+                args.archive_dir,
+                codec=args.archive_codec,
+                segment_bytes=args.archive_segment_mb * 1048576,
+                segment_seconds=args.archive_segment_seconds,
+                keep_segments=args.archive_keep
+            )
+        except (ValueError, OSError) as e:
+            parser.error(f"--archive-dir: {e}")
+
+    sink = None
+    if args.output_protocol == 'http':
+        if not args.http_url:
+            parser.error('--output-protocol http requires --http-url')
+        if args.http_flush_interval <= 0:
+            parser.error('--http-flush-interval must be positive')
+        if args.http_max_in_flight < 1:
+            parser.error('--http-max-in-flight must be at least 1')
+        headers = {}
+        for header in args.http_header:
+            name, sep, value = header.partition(':')
+            if not sep:
+                parser.error(f"Invalid --http-header (expected NAME:VALUE): {header}")
+            headers[name.strip()] = value.strip()
+        try:
+            sink = HttpSink(
+                args.http_url,
+                payload_format=args.http_format,
+                headers=headers,
+                max_events=args.http_batch_events,
+                max_bytes=args.http_batch_bytes,
+                flush_interval=args.http_flush_interval,
+                max_in_flight=args.http_max_in_flight,
+                max_retries=args.http_max_retries,
+                verify_tls=not args.http_insecure
+            )
+        except ValueError as e:
+            parser.error(str(e))
+
+    correlator = None
+    if args.correlate_failures:
+        try:
+            correlator = FailureCorrelator(
+                window=args.correlation_window,
+                threshold=args.correlation_threshold,
+                escalate_to=args.correlation_severity,
+                idle_timeout=args.correlation_idle_timeout,
+                max_keys=args.correlation_max_keys,
+                emit_summary=args.correlation_summary
+            )
+        except ValueError as e:
+            parser.error(f"--correlate-failures: {e}")
+
+    timers = StageTimers(enabled=args.stage_timers)
+    profiler = SamplingProfiler(
+        threading.main_thread().ident,
+        duration=args.profile_seconds,
+        interval=args.profile_interval / 1000.0,
+        output_dir=args.profile_dir
+    )
+    sequences = None
+    if args.track_sequence:
+        try:
+            sequences = SequenceTracker(window=args.sequence_window)
+        except ValueError as e:
+            parser.error(f"--sequence-window: {e}")
+
+    install_profiling_hooks(profiler, timers, sequences)
+
     run_interceptor(
         listen_ip=args.listen_ip,
         listen_port=args.listen_port,
         forward_ip=args.forward_ip,
         forward_port=args.forward_port,
         input_protocol=args.input_protocol,
-        output_protocol=args.output_protocol
+        output_protocol=args.output_protocol,
+        correlator=correlator,
+        timers=timers,
+        sink=sink,
+        sequences=sequences,
+        queue_size=args.queue_size,
+        high_watermark=high_watermark,
+        low_watermark=low_watermark,
+        archive=raw_archive,
+        lane_weights=lane_weights
     )
 
 
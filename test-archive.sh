@@ -0,0 +1,110 @@
+#!/bin/bash
+#
+# Test script for CEF Interceptor - Raw archive and fetch
+# Runs the interceptor with --archive-dir, sends a few messages, then
+# extracts them with `cef-interceptor.py fetch` and compares the bytes
+#
+
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+RED='\033[0;31m'
+NC='\033[0m'
+
+LISTEN_PORT=${1:-5514}
+FORWARD_PORT=${2:-5515}
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+ARCHIVE_DIR=$(mktemp -d)
+WORK_DIR=$(mktemp -d)
+
+echo -e "${GREEN}============================================${NC}"
+echo -e "${GREEN}CEF Interceptor Raw Archive Test${NC}"
+echo -e "${GREEN}============================================${NC}"
+echo ""
+echo "Interceptor: UDP 127.0.0.1:$LISTEN_PORT → 127.0.0.1:$FORWARD_PORT, archive in $ARCHIVE_DIR"
+echo ""
+
+# Check if netcat is available
+if ! command -v nc &> /dev/null; then
+    echo -e "${RED}Error: netcat (nc) is required but not installed${NC}"
+    exit 1
+fi
+
+python3 "$SCRIPT_DIR/cef-interceptor.py" --listen-ip 127.0.0.1 --listen-port "$LISTEN_PORT" \
+    --forward-ip 127.0.0.1 --forward-port "$FORWARD_PORT" --archive-dir "$ARCHIVE_DIR" &
+INTERCEPTOR_PID=$!
+
+trap 'kill $INTERCEPTOR_PID 2>/dev/null; rm -rf "$ARCHIVE_DIR" "$WORK_DIR"' EXIT
+sleep 1
+
+MSG1='CEF:0|Palo Alto Networks|PAN-OS|11.0.1|GLOBALPROTECT|auth|3|PanOSEventStatus=success PanOSSourceUserName=jdoe'
+MSG2='CEF:0|Palo Alto Networks|PAN-OS|11.0.1|GLOBALPROTECT|auth|3|PanOSEventStatus=failed PanOSSourceUserName=baduser'
+MSG3='<134>Jan 15 14:30:00 hostname some random syslog message'
+MSG4=$'first line of a datagram\nsecond line of the same datagram'
+
+FROM=$(( $(date +%s) - 1 ))
+echo -e "${YELLOW}Sending 4 messages (the last one contains a newline)${NC}"
+for msg in "$MSG1" "$MSG2" "$MSG3" "$MSG4"; do
+    printf '%s' "$msg" | nc -u -w1 127.0.0.1 $LISTEN_PORT
+done
+
+# The archive writes a block once it is 5 seconds old
+echo "Waiting for the archive block to be written..."
+sleep 7
+TO=$(date +%s)
+
+FAILED=0
+
+echo -e "${YELLOW}Test 1: fetch --from/--to returns the exact bytes, one message per line${NC}"
+printf '%s\n' "$MSG1" "$MSG2" "$MSG3" "$MSG4" > "$WORK_DIR/expected.txt"
+python3 "$SCRIPT_DIR/cef-interceptor.py" fetch --archive-dir "$ARCHIVE_DIR" \
+    --from "$FROM" --to "$TO" --output "$WORK_DIR/fetched.txt"
+if cmp -s "$WORK_DIR/expected.txt" "$WORK_DIR/fetched.txt"; then
+    echo -e "${GREEN}✓ Line output matches${NC}"
+else
+    echo -e "${RED}✗ Line output differs${NC}"
+    diff "$WORK_DIR/expected.txt" "$WORK_DIR/fetched.txt"
+    FAILED=1
+fi
+echo ""
+
+echo -e "${YELLOW}Test 2: fetch --framed keeps the multi-line datagram as one message${NC}"
+python3 "$SCRIPT_DIR/cef-interceptor.py" fetch --archive-dir "$ARCHIVE_DIR" \
+    --from "$FROM" --to "$TO" --framed --output "$WORK_DIR/fetched.bin"
+if python3 - "$WORK_DIR/fetched.bin" "$MSG1" "$MSG2" "$MSG3" "$MSG4" << 'PYEOF'
+import struct, sys
+data = open(sys.argv[1], 'rb').read()
+messages, pos = [], 0
+while pos < len(data):
+    ts_ms, size = struct.unpack_from('>QI', data, pos)
+    messages.append(data[pos + 12:pos + 12 + size])
+    pos += 12 + size
+expected = [m.encode('utf-8') for m in sys.argv[2:]]
+if messages != expected:
+    print(f"expected {expected!r}\ngot      {messages!r}")
+    sys.exit(1)
+PYEOF
+then
+    echo -e "${GREEN}✓ Framed output matches (4 messages)${NC}"
+else
+    echo -e "${RED}✗ Framed output differs${NC}"
+    FAILED=1
+fi
+echo ""
+
+echo -e "${YELLOW}Test 3: a range before the messages returns nothing${NC}"
+python3 "$SCRIPT_DIR/cef-interceptor.py" fetch --archive-dir "$ARCHIVE_DIR" \
+    --from $(( FROM - 3600 )) --to $(( FROM - 1800 )) --output "$WORK_DIR/empty.txt"
+if [ ! -s "$WORK_DIR/empty.txt" ]; then
+    echo -e "${GREEN}✓ Empty${NC}"
+else
+    echo -e "${RED}✗ Unexpected output${NC}"
+    FAILED=1
+fi
+echo ""
+
+if [ $FAILED -eq 0 ]; then
+    echo -e "${GREEN}Test complete - all archive checks passed${NC}"
+else
+    echo -e "${RED}Test complete - archive checks FAILED${NC}"
+fi
+exit $FAILED
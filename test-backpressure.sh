@@ -0,0 +1,138 @@
+#!/bin/bash
+#
+# Test script for CEF Interceptor - TCP backpressure
+# Sends several concurrent TCP streams into an interceptor with a small
+# --queue-size whose HTTP output is deliberately slow, then checks that
+# every message arrives and that input was paused (Backpressure stats)
+#
+
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+RED='\033[0;31m'
+NC='\033[0m'
+
+LISTEN_PORT=${1:-5514}
+HTTP_PORT=${2:-18080}
+STREAMS=${3:-4}
+PER_STREAM=${4:-5000}
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+WORK_DIR=$(mktemp -d)
+TOTAL=$(( STREAMS * PER_STREAM ))
+
+echo -e "${GREEN}============================================${NC}"
+echo -e "${GREEN}CEF Interceptor TCP Backpressure Test${NC}"
+echo -e "${GREEN}============================================${NC}"
+echo ""
+echo "Interceptor: TCP 127.0.0.1:$LISTEN_PORT → slow http://127.0.0.1:$HTTP_PORT/ingest"
+echo "Sending $STREAMS streams x $PER_STREAM messages = $TOTAL"
+echo ""
+
+# Slow stand-in ingestion endpoint: counts NDJSON events, 20ms per batch
+python3 - "$HTTP_PORT" "$WORK_DIR/received" << 'PYEOF' &
+import gzip, os, sys, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+lock = threading.Lock()
+received = 0
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        global received
+        body = gzip.decompress(self.rfile.read(int(self.headers['Content-Length'])))
+        time.sleep(0.02)
+        with lock:
+            received += body.count(b'\n')
+            with open(sys.argv[2] + '.tmp', 'w') as f:
+                f.write(str(received))
+            os.replace(sys.argv[2] + '.tmp', sys.argv[2])
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+ThreadingHTTPServer(('127.0.0.1', int(sys.argv[1])), Handler).serve_forever()
+PYEOF
+SERVER_PID=$!
+
+python3 "$SCRIPT_DIR/cef-interceptor.py" --listen-ip 127.0.0.1 --listen-port "$LISTEN_PORT" \
+    --input-protocol tcp --queue-size 2000 \
+    --output-protocol http --http-url "http://127.0.0.1:$HTTP_PORT/ingest" --http-format ndjson \
+    --http-batch-events 100 --http-max-in-flight 1 --http-flush-interval 0.2 \
+    2> "$WORK_DIR/interceptor.log" &
+INTERCEPTOR_PID=$!
+
+trap 'kill $INTERCEPTOR_PID $SERVER_PID 2>/dev/null; rm -rf "$WORK_DIR"' EXIT
+sleep 1
+
+echo -e "${YELLOW}Sending...${NC}"
+python3 - "$LISTEN_PORT" "$STREAMS" "$PER_STREAM" << 'PYEOF'
+import socket, sys, threading
+
+port, streams, per_stream = int(sys.argv[1]), int(sys.argv[2]), int(sys.argv[3])
+
+def stream(n):
+    sock = socket.create_connection(('127.0.0.1', port))
+    lines = b''.join(
+        f'CEF:0|Palo Alto Networks|PAN-OS|11.0.1|GLOBALPROTECT|auth|3|'
+        f'PanOSEventStatus=success PanOSSourceUserName=user{n}-{i}\n'.encode()
+        for i in range(per_stream))
+    sock.sendall(lines)
+    sock.close()
+
+threads = [threading.Thread(target=stream, args=(n,)) for n in range(streams)]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+PYEOF
+
+echo "Waiting for the output to drain..."
+for _ in $(seq 1 120); do
+    RECEIVED=$(cat "$WORK_DIR/received" 2>/dev/null || echo 0)
+    [ "$RECEIVED" -ge "$TOTAL" ] && break
+    sleep 0.5
+done
+RECEIVED=$(cat "$WORK_DIR/received" 2>/dev/null || echo 0)
+echo ""
+
+FAILED=0
+
+echo -e "${YELLOW}Test 1: no message lost${NC}"
+if [ "$RECEIVED" -eq "$TOTAL" ]; then
+    echo -e "${GREEN}✓ Received $RECEIVED of $TOTAL${NC}"
+else
+    echo -e "${RED}✗ Received $RECEIVED of $TOTAL${NC}"
+    FAILED=1
+fi
+echo ""
+
+echo -e "${YELLOW}Test 2: input was paused by backpressure${NC}"
+BP_LINE=$(grep 'Backpressure: paused' "$WORK_DIR/interceptor.log" | tail -1)
+if [ -n "$BP_LINE" ] && ! echo "$BP_LINE" | grep -q 'paused 0 times'; then
+    echo -e "${GREEN}✓ ${BP_LINE#* - INFO - }${NC}"
+else
+    echo -e "${RED}✗ No pause recorded: ${BP_LINE:-no Backpressure stats line}${NC}"
+    FAILED=1
+fi
+echo ""
+
+echo -e "${YELLOW}Test 3: nothing shed from the output lanes${NC}"
+SHED=$(grep 'Output lanes' "$WORK_DIR/interceptor.log" | tail -1 | grep -o '[0-9]* shed' | grep -v '^0 shed')
+if [ -z "$SHED" ]; then
+    echo -e "${GREEN}✓ 0 shed${NC}"
+else
+    echo -e "${RED}✗ Shed: $SHED${NC}"
+    FAILED=1
+fi
+echo ""
+
+if [ $FAILED -eq 0 ]; then
+    echo -e "${GREEN}Test complete - TCP backpressure checks passed${NC}"
+else
+    echo -e "${RED}Test complete - TCP backpressure checks FAILED${NC}"
+fi
+exit $FAILED
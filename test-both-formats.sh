@@ -94,6 +94,26 @@ echo -e "${GREEN}✓ Sent (WITHOUT severity field)${NC}"
 echo ""
 sleep 1
 
+echo -e "${BLUE}========================================${NC}"
+echo -e "${BLUE}Scenario 3: JSON and key=value input${NC}"
+echo -e "${BLUE}(Testing conversion to CEF)${NC}"
+echo -e "${BLUE}========================================${NC}"
+echo ""
+
+# Test 6: JSON GlobalProtect event (should be converted to CEF with severity 5)
+echo -e "${YELLOW}Test 6c: JSON failed event (should become CEF with severity 5)${NC}"
+echo '{"type": "GLOBALPROTECT", "subtype": "auth", "serial": "001234567890", "status": "failed", "srcuser": "baduser", "public_ip": "192.168.1.101"}' | nc -u -w1 $INTERCEPTOR_IP $INTERCEPTOR_PORT
+echo -e "${GREEN}✓ Sent (JSON)${NC}"
+echo ""
+sleep 1
+
+# Test 7: key=value GlobalProtect event (should be converted to CEF with severity 1)
+echo -e "${YELLOW}Test 7c: key=value success event (should become CEF with severity 1)${NC}"
+echo 'type=GLOBALPROTECT subtype=auth serial=001234567890 status=success srcuser=jdoe public_ip=192.168.1.100' | nc -u -w1 $INTERCEPTOR_IP $INTERCEPTOR_PORT
+echo -e "${GREEN}✓ Sent (key=value)${NC}"
+echo ""
+sleep 1
+
 echo -e "${GREEN}============================================${NC}"
 echo -e "${GREEN}Test suite completed!${NC}"
 echo -e "${GREEN}============================================${NC}"
@@ -114,5 +134,9 @@ echo "  Test 3b: No severity → 9 inserted (quarantine)"
 echo "  Test 4b: No severity → 8 inserted (error)"
 echo "  Test 5b: No severity → 7 inserted (tunnel-down)"
 echo ""
+echo -e "${BLUE}JSON / key=value (convert):${NC}"
+echo "  Test 6c: JSON → CEF:0|Palo Alto Networks|PAN-OS|-|GLOBALPROTECT|auth|5|..."
+echo "  Test 7c: key=value → CEF:0|Palo Alto Networks|PAN-OS|-|GLOBALPROTECT|auth|1|..."
+echo ""
 echo "All messages should have proper CEF format with severity in position 6"
 echo ""
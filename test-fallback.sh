@@ -83,6 +83,30 @@ echo -e "${GREEN}✓ Sent (should forward unmodified)${NC}"
 echo ""
 sleep 1
 
+echo -e "${YELLOW}Test 8: Non-PAN syslog message containing key=value pairs${NC}"
+echo '<134>Jan 15 14:30:00 hostname sshd action=login user=bob result=ok' | nc -u -w1 $INTERCEPTOR_IP $INTERCEPTOR_PORT
+echo -e "${GREEN}✓ Sent (should forward unmodified - no GlobalProtect fields)${NC}"
+echo ""
+sleep 1
+
+echo -e "${YELLOW}Test 9: JSON without GlobalProtect fields${NC}"
+echo '{"app": "nginx", "level": "info", "msg": "request served"}' | nc -u -w1 $INTERCEPTOR_IP $INTERCEPTOR_PORT
+echo -e "${GREEN}✓ Sent (should forward unmodified - no GlobalProtect fields)${NC}"
+echo ""
+sleep 1
+
+echo -e "${YELLOW}Test 10: Foreign key=value with generic type=/status= keys (auditd-style)${NC}"
+echo 'type=SYSCALL msg=audit(1705329000.123:42) syscall=59 status=failed reason=denied' | nc -u -w1 $INTERCEPTOR_IP $INTERCEPTOR_PORT
+echo -e "${GREEN}✓ Sent (should forward unmodified - type is not GLOBALPROTECT)${NC}"
+echo ""
+sleep 1
+
+echo -e "${YELLOW}Test 11: Foreign JSON with generic status/reason keys${NC}"
+echo '{"level": "warn", "status": "failed", "reason": "quota"}' | nc -u -w1 $INTERCEPTOR_IP $INTERCEPTOR_PORT
+echo -e "${GREEN}✓ Sent (should forward unmodified - no GlobalProtect marker)${NC}"
+echo ""
+sleep 1
+
 echo -e "${GREEN}============================================${NC}"
 echo -e "${GREEN}Test suite completed!${NC}"
 echo -e "${GREEN}============================================${NC}"
@@ -98,7 +122,7 @@ echo "  - Parsing may fail due to edge cases"
 echo "  - Fallback should insert severity=5"
 echo "  - Messages should still be valid CEF for Sentinel"
 echo ""
-echo -e "${BLUE}Non-CEF (Tests 6-7):${NC}"
+echo -e "${BLUE}Non-CEF (Tests 6-11):${NC}"
 echo "  - Should forward completely unmodified"
 echo "  - No attempt to insert severity"
 echo ""
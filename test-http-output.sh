@@ -0,0 +1,71 @@
+#!/bin/bash
+#
+# Test script for CEF Interceptor - HTTP output
+# Starts a local stand-in ingestion endpoint, runs the interceptor with
+# --output-protocol http, sends sample events and prints the decoded batches
+#
+
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+RED='\033[0;31m'
+NC='\033[0m'
+
+LISTEN_PORT=${1:-5514}
+HTTP_PORT=${2:-18080}
+HTTP_FORMAT=${3:-json}
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+
+echo -e "${GREEN}============================================${NC}"
+echo -e "${GREEN}CEF Interceptor HTTP Output Test${NC}"
+echo -e "${GREEN}============================================${NC}"
+echo ""
+echo "Interceptor: UDP 127.0.0.1:$LISTEN_PORT → http://127.0.0.1:$HTTP_PORT/ingest ($HTTP_FORMAT)"
+echo ""
+
+# Check if netcat is available
+if ! command -v nc &> /dev/null; then
+    echo -e "${RED}Error: netcat (nc) is required but not installed${NC}"
+    exit 1
+fi
+
+# Stand-in ingestion endpoint: keep-alive, gunzips and prints each batch
+python3 - "$HTTP_PORT" << 'PYEOF' &
+import gzip, sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = gzip.decompress(self.rfile.read(int(self.headers['Content-Length'])))
+        print(f"--- batch ({self.headers['Content-Type']}, {len(body)} bytes) ---", flush=True)
+        print(body.decode('utf-8'), flush=True)
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+ThreadingHTTPServer(('127.0.0.1', int(sys.argv[1])), Handler).serve_forever()
+PYEOF
+SERVER_PID=$!
+
+python3 "$SCRIPT_DIR/cef-interceptor.py" --listen-ip 127.0.0.1 --listen-port "$LISTEN_PORT" \
+    --output-protocol http --http-url "http://127.0.0.1:$HTTP_PORT/ingest" \
+    --http-format "$HTTP_FORMAT" --http-batch-events 3 --http-flush-interval 1 &
+INTERCEPTOR_PID=$!
+
+trap 'kill $INTERCEPTOR_PID $SERVER_PID 2>/dev/null' EXIT
+sleep 1
+
+echo -e "${YELLOW}Sending 4 events (one full batch of 3, one time-based flush)${NC}"
+echo 'CEF:0|Palo Alto Networks|PAN-OS|11.0.1|GLOBALPROTECT|auth|3|PanOSEventStatus=success PanOSSourceUserName=jdoe' | nc -u -w1 127.0.0.1 $LISTEN_PORT
+echo 'CEF:0|Palo Alto Networks|PAN-OS|11.0.1|GLOBALPROTECT|auth|3|PanOSEventStatus=failed PanOSSourceUserName=baduser' | nc -u -w1 127.0.0.1 $LISTEN_PORT
+echo 'CEF:0|Palo Alto Networks|PAN-OS|11.0.1|GLOBALPROTECT|quarantine|PanOSQuarantineReason=Quarantined-by-admin' | nc -u -w1 127.0.0.1 $LISTEN_PORT
+echo 'CEF:0|Palo Alto Networks|PAN-OS|11.0.1|GLOBALPROTECT|tunnel-down|PanOSGateway=vpn-gw-02.example.com' | nc -u -w1 127.0.0.1 $LISTEN_PORT
+sleep 3
+
+echo ""
+echo -e "${GREEN}Test complete - expect two batches above (3 events, then 1 event)${NC}"
+echo "Severities: 1 (success), 5 (failed), 9 (quarantine), 7 (tunnel-down)"
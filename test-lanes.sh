@@ -0,0 +1,115 @@
+#!/bin/bash
+#
+# Test script for CEF Interceptor - Severity-priority output lanes
+# Floods the interceptor over UDP with low-severity events while its HTTP
+# output is deliberately slow, sends one quarantine event (severity 9) into
+# the backlog, and checks that it is delivered ahead of the low-lane backlog
+#
+
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+RED='\033[0;31m'
+NC='\033[0m'
+
+LISTEN_PORT=${1:-5514}
+HTTP_PORT=${2:-18080}
+FLOOD=${3:-5000}
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+WORK_DIR=$(mktemp -d)
+
+echo -e "${GREEN}============================================${NC}"
+echo -e "${GREEN}CEF Interceptor Output Lanes Test${NC}"
+echo -e "${GREEN}============================================${NC}"
+echo ""
+echo "Interceptor: UDP 127.0.0.1:$LISTEN_PORT → slow http://127.0.0.1:$HTTP_PORT/ingest"
+echo "Flood: $FLOOD low-severity events, then 1 quarantine event"
+echo ""
+
+# Slow stand-in ingestion endpoint: appends each event's severity in arrival order
+python3 - "$HTTP_PORT" "$WORK_DIR/severities" << 'PYEOF' &
+import gzip, json, sys, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = gzip.decompress(self.rfile.read(int(self.headers['Content-Length'])))
+        time.sleep(0.02)
+        with open(sys.argv[2], 'a') as f:
+            for line in body.splitlines():
+                f.write(f"{json.loads(line)['severity']}\n")
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+ThreadingHTTPServer(('127.0.0.1', int(sys.argv[1])), Handler).serve_forever()
+PYEOF
+SERVER_PID=$!
+
+python3 "$SCRIPT_DIR/cef-interceptor.py" --listen-ip 127.0.0.1 --listen-port "$LISTEN_PORT" \
+    --output-protocol http --http-url "http://127.0.0.1:$HTTP_PORT/ingest" --http-format ndjson \
+    --http-batch-events 50 --http-max-in-flight 1 --http-flush-interval 0.2 \
+    2> "$WORK_DIR/interceptor.log" &
+INTERCEPTOR_PID=$!
+
+trap 'kill $INTERCEPTOR_PID $SERVER_PID 2>/dev/null; rm -rf "$WORK_DIR"' EXIT
+sleep 1
+
+echo -e "${YELLOW}Flooding...${NC}"
+python3 - "$LISTEN_PORT" "$FLOOD" << 'PYEOF'
+import socket, sys, time
+
+port, flood = int(sys.argv[1]), int(sys.argv[2])
+sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+for i in range(flood):
+    sock.sendto(f'CEF:0|Palo Alto Networks|PAN-OS|11.0.1|GLOBALPROTECT|auth|3|'
+                f'PanOSEventStatus=success PanOSSourceUserName=user{i}'.encode(),
+                ('127.0.0.1', port))
+    if i % 50 == 49:
+        time.sleep(0.002)  # stay inside the kernel receive buffer
+PYEOF
+sleep 0.2
+echo -e "${YELLOW}Sending quarantine event${NC}"
+printf '%s' 'CEF:0|Palo Alto Networks|PAN-OS|11.0.1|GLOBALPROTECT|quarantine|5|PanOSQuarantineReason=Quarantined-by-admin' \
+    | nc -u -w1 127.0.0.1 $LISTEN_PORT
+
+echo "Waiting for the output to drain..."
+LAST=-1
+for _ in $(seq 1 60); do
+    sleep 1
+    COUNT=$(wc -l < "$WORK_DIR/severities" 2>/dev/null || echo 0)
+    [ "$COUNT" -eq "$LAST" ] && break
+    LAST=$COUNT
+done
+echo ""
+
+FAILED=0
+POSITION=$(grep -n '^9$' "$WORK_DIR/severities" | head -1 | cut -d: -f1)
+TOTAL=$(wc -l < "$WORK_DIR/severities")
+LATER=$(( TOTAL - ${POSITION:-$TOTAL} ))
+
+echo -e "${YELLOW}Test 1: quarantine event delivered ahead of the low-lane backlog${NC}"
+if [ -z "$POSITION" ]; then
+    echo -e "${RED}✗ Quarantine event not delivered${NC}"
+    FAILED=1
+elif [ "$LATER" -ge $(( FLOOD / 4 )) ]; then
+    echo -e "${GREEN}✓ Delivered as event $POSITION of $TOTAL; $LATER low events were still queued behind it${NC}"
+else
+    echo -e "${RED}✗ Delivered as event $POSITION of $TOTAL; only $LATER low events after it${NC}"
+    FAILED=1
+fi
+echo ""
+
+grep 'Output lanes' "$WORK_DIR/interceptor.log" | tail -1 | sed 's/.* - INFO - /Lanes at the end of the flood: /'
+echo ""
+
+if [ $FAILED -eq 0 ]; then
+    echo -e "${GREEN}Test complete - lane priority checks passed${NC}"
+else
+    echo -e "${RED}Test complete - lane priority checks FAILED${NC}"
+fi
+exit $FAILED